@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import Annotated
 from supabase import Client
 
 from app.core import deps
+from app.core.resilience import UpstreamUnavailable
 from app.schemas.shipment import ShipmentAssignRequest
 from app.services.shipment_service import ShipmentService
 
@@ -54,6 +55,8 @@ def assign_shipment_partner(
         if not res.data or res.data.get('roles', {}).get('name') != 'admin':
              raise HTTPException(status_code=403, detail="Admin privileges required")
 
+    except UpstreamUnavailable:
+        raise
     except Exception:
          # Fallback/Edge case
          raise HTTPException(status_code=403, detail="Admin privileges required")
@@ -62,11 +65,18 @@ def assign_shipment_partner(
     try:
         service.assign_partner(user_id, id, assign_in.partner_id)
         return {"message": "Partner assigned successfully"}
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-from app.schemas.shipment import ShipmentForceStatusRequest, ShipmentAdminListResponse
-from typing import List, Optional
+from app.schemas.shipment import ShipmentForceStatusRequest, ShipmentDetailPartial, AutoDispatchRequest
+from app.services.projection import ShipmentProjection, parse_csv_param
+from app.core.config import settings
+from app.core.serialization import FastJSONResponse, TrustedSerializer
+
+detail_serializer = TrustedSerializer(ShipmentDetailPartial)
+from typing import List, Literal, Optional
 
 @router.post("/shipments/{id}/force-status")
 def force_shipment_status(
@@ -84,6 +94,8 @@ def force_shipment_status(
         res = supabase.table("user_profiles").select("roles(name)").eq("id", current_user['id']).single().execute()
         if not res.data or res.data.get('roles', {}).get('name') != 'admin':
              raise HTTPException(status_code=403, detail="Admin privileges required")
+    except UpstreamUnavailable:
+        raise
     except:
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
@@ -91,6 +103,36 @@ def force_shipment_status(
     try:
         service.force_shipment_status(current_user['id'], id, force_in)
         return {"message": "Status force-updated successfully"}
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/shipments/auto-dispatch", response_model=dict)
+def auto_dispatch_shipments(
+    dispatch_in: AutoDispatchRequest,
+    current_user: Annotated[dict, Depends(deps.get_current_user)],
+    supabase: Annotated[Client, Depends(deps.get_supabase)]
+):
+    """
+    ADMIN ONLY: Assign all unassigned PENDING shipments in a pincode region
+    to the least-loaded eligible partners. Use dry_run to preview the plan.
+    """
+    user_id = current_user['id']
+    try:
+        res = supabase.table("user_profiles").select("roles(name)").eq("id", user_id).single().execute()
+        if not res.data or res.data.get('roles', {}).get('name') != 'admin':
+             raise HTTPException(status_code=403, detail="Admin privileges required")
+    except UpstreamUnavailable:
+        raise
+    except:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+
+    service = ShipmentService(supabase)
+    try:
+        return service.auto_dispatch(user_id, dispatch_in)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -110,6 +152,8 @@ def list_all_shipments(
         res = supabase.table("user_profiles").select("roles(name)").eq("id", user_id).single().execute()
         if not res.data or res.data.get('roles', {}).get('name') != 'admin':
              raise HTTPException(status_code=403, detail="Admin privileges required")
+    except UpstreamUnavailable:
+        raise
     except:
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
@@ -118,16 +162,53 @@ def list_all_shipments(
     if status: filters['status'] = status
     if partner_id: filters['partner_id'] = partner_id
     
-    return service.get_all_shipments(filters)
+    result = service.get_all_shipments(filters)
+    if settings.FAST_SERIALIZATION:
+        return FastJSONResponse(result)
+    return result
+
+@router.get("/shipments/search", response_model=dict)
+def search_shipments(
+    current_user: Annotated[dict, Depends(deps.get_current_user)],
+    supabase: Annotated[Client, Depends(deps.get_supabase)],
+    q: str = Query(..., min_length=2, max_length=100),
+    field: Optional[Literal["tracking_id", "contact_phone", "contact_name", "city"]] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    ADMIN ONLY: Search shipments by tracking ID prefix, phone (exact/prefix),
+    contact name or city (fuzzy). Served from the in-process search index.
+    """
+    # Verify Admin
+    user_id = current_user['id']
+    try:
+        res = supabase.table("user_profiles").select("roles(name)").eq("id", user_id).single().execute()
+        if not res.data or res.data.get('roles', {}).get('name') != 'admin':
+             raise HTTPException(status_code=403, detail="Admin privileges required")
+    except UpstreamUnavailable:
+        raise
+    except:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+
+    service = ShipmentService(supabase)
+    return service.search_shipments(q, field=field, limit=limit)
 
-@router.get("/shipments/{id}", response_model=ShipmentAdminListResponse)
+@router.get(
+    "/shipments/{id}",
+    response_model=ShipmentDetailPartial,
+    response_model_exclude_unset=True
+)
 def get_shipment_detail_admin(
     id: str,
     current_user: Annotated[dict, Depends(deps.get_current_user)],
-    supabase: Annotated[Client, Depends(deps.get_supabase)]
+    supabase: Annotated[Client, Depends(deps.get_supabase)],
+    fields: Optional[str] = Query(None, description="Comma-separated shipment fields (incl. assigned_partner_id)"),
+    include: Optional[str] = Query(None, description="Comma-separated embeds: addresses,events,items"),
+    events_limit: Optional[int] = Query(None, ge=0, le=1000, description="Only the latest N events")
 ):
     """
     ADMIN ONLY: Get full details + derived partner.
+    fields/include/events_limit trim the query and the payload.
     """
     # Verify Admin
     user_id = current_user['id']
@@ -135,13 +216,28 @@ def get_shipment_detail_admin(
         res = supabase.table("user_profiles").select("roles(name)").eq("id", user_id).single().execute()
         if not res.data or res.data.get('roles', {}).get('name') != 'admin':
              raise HTTPException(status_code=403, detail="Admin privileges required")
+    except UpstreamUnavailable:
+        raise
     except:
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
+    try:
+        projection = ShipmentProjection(
+            fields=parse_csv_param(fields),
+            include=parse_csv_param(include),
+            events_limit=events_limit,
+            default_include=("addresses", "events", "items"),
+            extra_fields=("assigned_partner_id",)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     service = ShipmentService(supabase)
-    shipment = service.get_admin_shipment_detail(id)
+    shipment = service.get_admin_shipment_detail(id, projection)
     
     if not shipment:
         raise HTTPException(status_code=404, detail="Shipment not found")
-        
+
+    if settings.FAST_SERIALIZATION:
+        return detail_serializer.response(shipment)
     return shipment
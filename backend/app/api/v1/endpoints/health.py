@@ -1,7 +1,30 @@
-from fastapi import APIRouter
+import secrets
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import metrics
 
 router = APIRouter()
 
 @router.get("/health")
 def health_check():
     return {"status": "ok", "message": "Service is healthy"}
+
+@router.get("/metrics")
+def get_metrics(authorization: Annotated[Optional[str], Header()] = None):
+    """
+    In-process counters and gauges (DB breakers/timeouts, load shedding, ...).
+    Internal only: requires `Authorization: Bearer <METRICS_TOKEN>`; disabled when unset.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return metrics.snapshot()
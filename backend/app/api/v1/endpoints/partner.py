@@ -3,6 +3,7 @@ from typing import Annotated
 from supabase import Client
 
 from app.core import deps
+from app.core.resilience import UpstreamUnavailable
 from app.schemas.shipment import ShipmentScanRequest
 from app.services.shipment_service import ShipmentService
 
@@ -32,6 +33,8 @@ def scan_shipment_status(
             # But what if Admin is the one scanning? "Admin override allowed" (Rule 5).
             if role_name != 'admin' and role_name != 'partner':
                  raise HTTPException(status_code=403, detail="Partner privileges required")
+    except UpstreamUnavailable:
+        raise
     except Exception:
         raise HTTPException(status_code=403, detail="Access verification failed")
 
@@ -39,6 +42,8 @@ def scan_shipment_status(
     try:
         service.scan_shipment(user_id, id, scan_in)
         return {"message": "Scan recorded successfully", "status": scan_in.status}
+    except UpstreamUnavailable:
+        raise
     except ValueError as e:
         if "Access Denied" in str(e):
              raise HTTPException(status_code=403, detail=str(e))
@@ -47,3 +52,51 @@ def scan_shipment_status(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+from typing import Optional
+from app.core.config import settings
+from app.schemas.shipment import RunSheetResponse
+from app.services.route_optimizer import plan_run_sheet, locate_pincode
+
+@router.get("/run-sheet", response_model=RunSheetResponse)
+def get_run_sheet(
+    current_user: Annotated[dict, Depends(deps.get_current_user)],
+    supabase: Annotated[Client, Depends(deps.get_supabase)],
+    start_pincode: Optional[str] = None,
+    start_lat: Optional[float] = None,
+    start_lon: Optional[float] = None
+):
+    """
+    PARTNER ONLY: Delivery order for the caller's OUT_FOR_DELIVERY shipments.
+    Start point: explicit lat/lon, else start_pincode centroid, else best first stop.
+    """
+    user_id = current_user['id']
+
+    # 1. Verify Partner Role
+    try:
+        res = supabase.table("user_profiles").select("roles(name)").eq("id", user_id).single().execute()
+        role_name = res.data.get('roles', {}).get('name')
+        if role_name != 'admin' and role_name != 'partner':
+            raise HTTPException(status_code=403, detail="Partner privileges required")
+    except UpstreamUnavailable:
+        raise
+    except Exception:
+        raise HTTPException(status_code=403, detail="Access verification failed")
+
+    start = None
+    if start_lat is not None and start_lon is not None:
+        start = (start_lat, start_lon)
+    elif start_pincode:
+        start = locate_pincode(start_pincode)
+        if start is None:
+            raise HTTPException(status_code=400, detail=f"Unknown start pincode: {start_pincode}")
+
+    service = ShipmentService(supabase)
+    try:
+        stops = service.get_partner_run_sheet_stops(user_id)
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return plan_run_sheet(stops, start=start, time_budget_ms=settings.ROUTE_TIME_BUDGET_MS)
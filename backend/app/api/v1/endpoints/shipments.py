@@ -1,41 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Annotated, List, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from typing import Annotated, List, Any, Optional
 from supabase import Client
 
 from app.core import deps
-from app.schemas.shipment import ShipmentDetail, ShipmentEventBase
+from app.core.resilience import UpstreamUnavailable
+from app.schemas.shipment import ShipmentEventPartial, ShipmentDetailPartial, ShipmentListResponse, ShipmentStatus
+from app.services.projection import ShipmentProjection, parse_csv_param
+from app.services.cursor import decode_cursor
 from app.services.shipment_service import ShipmentService
+from app.core.config import settings
+from app.core.serialization import TrustedSerializer
 
 router = APIRouter()
 
-@router.get("/{shipment_id}/events", response_model=List[ShipmentEventBase])
+detail_serializer = TrustedSerializer(ShipmentDetailPartial)
+events_serializer = TrustedSerializer(List[ShipmentEventPartial])
+list_serializer = TrustedSerializer(ShipmentListResponse)
+
+@router.get("", response_model=ShipmentListResponse)
+def list_my_shipments(
+    current_user: Annotated[dict, Depends(deps.get_current_user)],
+    supabase: Annotated[Client, Depends(deps.get_supabase)],
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    status: Optional[ShipmentStatus] = None
+):
+    """
+    Private Endpoint: The caller's shipments, newest first, keyset-paginated.
+    Summaries only (status, tracking ID, latest event, destination city) plus
+    per-status counts over all of the caller's shipments.
+    """
+    user_id = current_user.get("id")
+    if not user_id:
+         raise HTTPException(status_code=401, detail="User ID not found in token")
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    service = ShipmentService(supabase)
+    result = service.get_owner_shipments(user_id, after, limit, status.value if status else None)
+
+    if settings.FAST_SERIALIZATION:
+        return list_serializer.response(result)
+    return result
+
+@router.get(
+    "/{shipment_id}/events",
+    response_model=List[ShipmentEventPartial],
+    response_model_exclude_unset=True
+)
 def get_shipment_events(
     shipment_id: str,
+    response: Response,
     current_user: Annotated[dict, Depends(deps.get_current_user)],
-    supabase: Annotated[Client, Depends(deps.get_supabase)]
+    supabase: Annotated[Client, Depends(deps.get_supabase)],
+    fields: Optional[str] = Query(None, description="Comma-separated event fields, e.g. status,created_at"),
+    limit: Optional[int] = Query(
+        None, ge=0, le=1000,
+        description="Without `since`: only the latest N events. With `since`: at most N newer events"
+    ),
+    since: Optional[str] = Query(None, description="X-Next-Cursor from a previous call: only newer events")
 ):
     """
-    Private Endpoint: Get full event timeline for a shipment.
+    Private Endpoint: Get the event timeline for a shipment (oldest first).
     Requires Authentication.
     User must own the shipment.
+    The X-Next-Cursor response header is the `since` value for the next refresh.
     """
     user_id = current_user.get("id")
     if not user_id:
          raise HTTPException(status_code=401, detail="User ID not found in token")
 
+    try:
+        projection = ShipmentProjection(
+            fields=[], include=["events"], event_fields=parse_csv_param(fields), events_limit=limit
+        )
+        cursor = decode_cursor(since) if since else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     service = ShipmentService(supabase)
-    
-    # Reusing logic that gets full data to ensure ownership validation
-    shipment = service.get_private_shipment_data(shipment_id, user_id)
-    
-    
+    result = service.get_shipment_events_since(shipment_id, user_id, projection, cursor)
+
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shipment not found or access denied"
+        )
+
+    events, next_cursor = result
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if settings.FAST_SERIALIZATION:
+        return events_serializer.response(events, headers=headers)
+    response.headers.update(headers)
+    return events
+
+@router.get(
+    "/{shipment_id}",
+    response_model=ShipmentDetailPartial,
+    response_model_exclude_unset=True
+)
+def get_shipment_detail(
+    shipment_id: str,
+    current_user: Annotated[dict, Depends(deps.get_current_user)],
+    supabase: Annotated[Client, Depends(deps.get_supabase)],
+    fields: Optional[str] = Query(None, description="Comma-separated shipment fields, e.g. status,tracking_id"),
+    include: Optional[str] = Query(None, description="Comma-separated embeds: addresses,events,items"),
+    events_limit: Optional[int] = Query(None, ge=0, le=1000, description="Only the latest N events")
+):
+    """
+    Private Endpoint: Shipment detail for the owner.
+    Defaults to all fields + addresses + events; fields/include trim the payload.
+    """
+    user_id = current_user.get("id")
+    if not user_id:
+         raise HTTPException(status_code=401, detail="User ID not found in token")
+
+    try:
+        projection = ShipmentProjection(
+            fields=parse_csv_param(fields), include=parse_csv_param(include), events_limit=events_limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    service = ShipmentService(supabase)
+    shipment = service.get_private_shipment_data(shipment_id, user_id, projection)
+
     if not shipment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Shipment not found or access denied"
         )
-        
-    return shipment.get("events", [])
+
+    if settings.FAST_SERIALIZATION:
+        return detail_serializer.response(shipment)
+    return shipment
 
 from app.schemas.shipment import ShipmentCreate, PickupScheduleRequest, ShipmentPublic
 from typing import Dict
@@ -65,6 +166,8 @@ def create_shipment_booking(
             "status": shipment['status'],
             "events": [] # Empty initially
         }
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -84,6 +187,8 @@ def schedule_shipment_pickup(
     try:
         service.schedule_pickup(user_id, shipment_id, pickup_in)
         return {"message": "Pickup scheduled successfully"}
+    except UpstreamUnavailable:
+        raise
     except ValueError as e:
         # Differentiate 403 vs 404/400 theoretically, for now simplified
         if "Access Denied" in str(e):
@@ -9,7 +9,7 @@ from app.services.shipment_service import ShipmentService
 router = APIRouter()
 
 @router.get("/track/{tracking_id}", response_model=ShipmentPublic)
-def track_shipment(
+async def track_shipment(
     tracking_id: str,
     supabase: Annotated[Client, Depends(deps.get_supabase)]
 ):
@@ -24,7 +24,8 @@ def track_shipment(
     # To respect "Do not expose user_id", the Service ensures data sanitization.
     
     service = ShipmentService(supabase)
-    shipment_data = service.get_public_tracking(tracking_id)
+    # Async so requests coalesced onto an in-flight fetch wait without a worker thread
+    shipment_data = await service.get_public_tracking_async(tracking_id)
     
     if not shipment_data:
         raise HTTPException(
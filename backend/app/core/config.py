@@ -11,8 +11,90 @@ class Settings(BaseSettings):
     
     # 60 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 60
+
+    # Admin search index (built in pages at startup; workers forked from a prebuilt
+    # snapshot only re-read shipments updated since, less the skew)
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_INDEX_PAGE_SIZE: int = 1000
+    SEARCH_INDEX_CATCH_UP_SKEW_SECONDS: int = 60
+    # The prefork master refreshes its snapshot before forking once it is this old
+    SEARCH_INDEX_REFRESH_SECONDS: int = 300
+
+    # Run-sheet routing (pincode,lat,lon CSV; defaults to app/data/pincode_centroids.csv)
+    PINCODE_DATA_PATH: str = ""
+    ROUTE_MATRIX_CACHE_SIZE: int = 256
+    ROUTE_TIME_BUDGET_MS: int = 500
+
+    # Cold archive for events of long-closed shipments (absolute path on a persistent volume)
+    EVENT_ARCHIVE_DIR: str = "/var/lib/shipments/archive/events"
+    EVENT_ARCHIVE_AFTER_DAYS: int = 90
+    EVENT_ARCHIVE_BLOCK_ROWS: int = 2048
+    EVENT_ARCHIVE_CACHE_BLOCKS: int = 64
+
+    # Public tracking rate limits (token bucket) and load shedding. Budgets are for the
+    # whole server: each of SERVE_WORKERS processes enforces its share
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PUBLIC_PER_MIN: int = 60
+    RATE_LIMIT_PUBLIC_BURST: int = 20
+    RATE_LIMIT_API_KEY_PER_MIN: int = 600
+    RATE_LIMIT_API_KEY_BURST: int = 100
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    TRACKING_API_KEYS: str = ""  # comma-separated; see tracking_api_keys
+    # Behind a proxy (the Vercel rewrite in vercel.json) every client arrives from the
+    # proxy's IP, so set TRUST_FORWARDED_FOR=true there or all public traffic shares
+    # one bucket. The client IP is the entry FORWARDED_TRUSTED_HOPS from the right of
+    # X-Forwarded-For (1 = added by the proxy right in front of us); entries further
+    # left are client-controlled. Only enable it when the app is NOT reachable directly.
+    TRUST_FORWARDED_FOR: bool = False
+    FORWARDED_TRUSTED_HOPS: int = 1
+    LOAD_SHED_MAX_INFLIGHT: int = 64
+    LOAD_SHED_PUBLIC_FRACTION: float = 0.5
+    LOAD_SHED_DEFAULT_FRACTION: float = 0.8
+
+    # Bearer token for GET /metrics (scrapers, ops); the endpoint is disabled when empty
+    METRICS_TOKEN: str = ""
+
+    # Supabase call deadlines, circuit breakers and hedged reads
+    DB_READ_TIMEOUT_SECONDS: float = 5.0
+    DB_WRITE_TIMEOUT_SECONDS: float = 10.0
+    AUTH_TIMEOUT_SECONDS: float = 5.0
+    DB_BREAKER_FAILURE_THRESHOLD: int = 5
+    DB_BREAKER_RESET_SECONDS: float = 10.0
+    DB_HEDGE_READS: bool = False
+    DB_HEDGE_AFTER_MS: int = 250
+    DB_CALL_MAX_WORKERS: int = 64
+
+    # Opt-in: skip response_model re-validation of service output, encode with orjson
+    FAST_SERIALIZATION: bool = False
+
+    # Multi-process serving (python -m app.serve)
+    SERVE_HOST: str = "0.0.0.0"
+    SERVE_PORT: int = 8000
+    SERVE_WORKERS: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    SERVE_MAX_REQUESTS: int = 10_000  # recycle a worker after this many requests (0 = never)
+    SERVE_MAX_REQUESTS_JITTER: int = 1_000
+    SERVE_GRACEFUL_TIMEOUT_SECONDS: int = 30
+
+    # Cross-worker cache invalidation: local | unix (same host) | redis (RESP broker)
+    INVALIDATION_TRANSPORT: str = "unix"
+    INVALIDATION_SOCKET_DIR: str = ""  # defaults to <tmp>/shipment-invalidation
+    INVALIDATION_SEND_TIMEOUT_MS: int = 50  # unix: wait this long for a full peer queue
+    INVALIDATION_REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    INVALIDATION_CHANNEL: str = "shipment-invalidation"
+    INVALIDATION_MAX_KEYS: int = 100_000
+    TRACKING_CACHE_TTL_SECONDS: float = 30.0
+    TRACKING_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Customer "my shipments" listing: per-user status counts
+    STATUS_COUNTS_CACHE_TTL_SECONDS: float = 300.0
+    STATUS_COUNTS_CACHE_MAX_USERS: int = 50_000
+
     BACKEND_CORS_ORIGINS: list[str] = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 
+    @property
+    def tracking_api_keys(self) -> frozenset[str]:
+        return frozenset(k.strip() for k in self.TRACKING_API_KEYS.split(",") if k.strip())
+
     class Config:
         case_sensitive = True
 
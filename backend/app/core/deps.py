@@ -1,12 +1,15 @@
 from typing import Generator, Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from app.core.config import settings
+from app.core.resilience import ResilientClient, UpstreamUnavailable
 
 # Supabase Client Factory
 def get_supabase() -> Generator[Client, None, None]:
-    client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    # httpx timeout bounds requests abandoned at the resilience deadline
+    options = ClientOptions(postgrest_client_timeout=max(settings.DB_READ_TIMEOUT_SECONDS, settings.DB_WRITE_TIMEOUT_SECONDS) * 2)
+    client = ResilientClient(create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options))
     try:
         yield client
     finally:
@@ -36,6 +39,8 @@ def get_current_user(
         # Identify admin role (optional, based on metadata or helper)
         # Note: In real app, we might check public.user_profiles or app_metadata
         return user.user
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
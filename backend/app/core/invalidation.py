@@ -0,0 +1,458 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# (key, data, (version before, version after))
+Handler = Callable[[str, Optional[Dict[str, Any]], Tuple[int, int]], None]
+
+
+def shipment_key(shipment_id: str) -> str:
+    return f"shipment:{shipment_id}"
+
+
+def tracking_key(tracking_id: str) -> str:
+    return f"tracking:{tracking_id}"
+
+
+def user_shipments_key(user_id: str) -> str:
+    return f"user-shipments:{user_id}"
+
+
+# --- Transports ---
+
+class LocalTransport:
+    """
+    Single process: nothing to deliver elsewhere.
+    """
+    def start(self, on_message: Callable[[bytes], None], on_gap: Callable[[], None]):
+        pass
+
+    def send(self, payload: bytes):
+        pass
+
+    def stop(self):
+        pass
+
+
+class UnixSocketTransport:
+    """
+    Same-host fan-out without a broker. Every worker binds a datagram socket
+    `<dir>/<pid>.sock`; publishing sends one datagram to every other socket in
+    the directory. Sockets of dead workers are unlinked by the first sender that
+    gets refused.
+
+    A peer whose receive queue stays full for `send_timeout` misses the message
+    (counted as invalidation.dropped). Every datagram carries the sender's id and a
+    per-peer sequence number that advances on every attempt, so the peer notices
+    the hole on the next message it does get from that sender and reports a gap
+    (the bus then treats all cached keys as stale). Until that next message, or
+    the cache TTL, the peer may serve its cached copy.
+    """
+    # Sender ids remembered per receiver; dead workers' ids age out
+    MAX_SENDERS = 1024
+
+    def __init__(self, directory: str, send_timeout: float = 0.05):
+        self.directory = directory
+        self.send_timeout = send_timeout
+        self.path: Optional[str] = None
+        self._sock: Optional[socket.socket] = None
+        self._sender: Optional[socket.socket] = None
+        self._sender_lock = threading.Lock()
+        self._sender_id: Optional[str] = None
+        self._sender_pid: Optional[int] = None
+        self._seq: Dict[str, int] = {}  # peer path -> last sequence number sent
+
+    def start(self, on_message: Callable[[bytes], None], on_gap: Callable[[], None]):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        threading.Thread(
+            target=self._receive, args=(self._sock, on_message, on_gap), name="invalidation-unix", daemon=True
+        ).start()
+
+    @classmethod
+    def _receive(cls, sock: socket.socket, on_message: Callable[[bytes], None], on_gap: Callable[[], None]):
+        last_seen: "OrderedDict[str, int]" = OrderedDict()  # sender id -> last sequence number
+        while True:
+            try:
+                datagram = sock.recv(65536)
+            except OSError:
+                return  # closed by stop()
+            header, _, payload = datagram.partition(b"\n")
+            try:
+                sender, seq = header.decode().rsplit(" ", 1)
+                seq = int(seq)
+            except ValueError:
+                continue
+            # A sender we haven't heard from starts its count for us at 1
+            if seq != last_seen.get(sender, 0) + 1:
+                metrics.inc("invalidation.gaps")
+                on_gap()
+            last_seen[sender] = seq
+            last_seen.move_to_end(sender)
+            if len(last_seen) > cls.MAX_SENDERS:
+                last_seen.popitem(last=False)
+            on_message(payload)
+
+    def send(self, payload: bytes):
+        try:
+            peers = [f for f in os.listdir(self.directory) if f.endswith(".sock")]
+        except FileNotFoundError:
+            return
+        with self._sender_lock:
+            if self._sender is None or self._sender_pid != os.getpid():
+                # Per process: a forked child must not reuse the parent's id or counters
+                self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._sender.settimeout(self.send_timeout)
+                self._sender_id = f"{os.getpid()}-{os.urandom(4).hex()}"
+                self._sender_pid = os.getpid()
+                self._seq = {}
+            live = set()
+            for name in peers:
+                path = os.path.join(self.directory, name)
+                if path == self.path:
+                    continue
+                live.add(path)
+                seq = self._seq[path] = self._seq.get(path, 0) + 1
+                try:
+                    self._sender.sendto(f"{self._sender_id} {seq}\n".encode() + payload, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    live.discard(path)
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except OSError:
+                    metrics.inc("invalidation.dropped")
+            for path in set(self._seq) - live:
+                del self._seq[path]
+
+    def stop(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RedisTransport:
+    """
+    Cross-host fan-out through a Redis-protocol broker (PUBLISH/SUBSCRIBE on one
+    channel). Speaks RESP directly over a socket, so anything RESP-compatible works,
+    including a local stand-in for tests.
+    Messages published while the subscription is down are lost, so every
+    (re)subscribe reports a gap and the bus treats all cached keys as stale.
+    """
+    def __init__(self, url: str, channel: str, timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.channel = channel
+        self.timeout = timeout
+        self._pub: Optional[Tuple[socket.socket, Any]] = None
+        self._pub_lock = threading.Lock()
+        self._stopped = False
+
+    @staticmethod
+    def _command(*parts: Any) -> bytes:
+        out = [f"*{len(parts)}\r\n".encode()]
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode()
+            out.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b"".join(out)
+
+    @classmethod
+    def _read_reply(cls, f) -> Any:
+        line = f.readline()
+        if not line:
+            raise ConnectionError("broker closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise ConnectionError(f"broker error: {rest.decode()}")
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            data = f.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            return [cls._read_reply(f) for _ in range(int(rest))]
+        raise ConnectionError(f"unexpected reply: {line!r}")
+
+    def _connect(self, timeout: Optional[float]) -> Tuple[socket.socket, Any]:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        f = sock.makefile("rb")
+        if self.password:
+            sock.sendall(self._command("AUTH", self.password))
+            self._read_reply(f)
+        sock.settimeout(timeout)
+        return sock, f
+
+    def start(self, on_message: Callable[[bytes], None], on_gap: Callable[[], None]):
+        self._stopped = False
+        threading.Thread(target=self._subscribe_loop, args=(on_message, on_gap), name="invalidation-redis", daemon=True).start()
+
+    def _subscribe_loop(self, on_message: Callable[[bytes], None], on_gap: Callable[[], None]):
+        backoff = 0.5
+        while not self._stopped:
+            try:
+                sock, f = self._connect(timeout=None)
+                try:
+                    sock.sendall(self._command("SUBSCRIBE", self.channel))
+                    self._read_reply(f)  # ['subscribe', channel, 1]
+                    backoff = 0.5
+                    # Anything published while we were away is gone
+                    on_gap()
+                    while not self._stopped:
+                        reply = self._read_reply(f)
+                        if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                            on_message(reply[2])
+                finally:
+                    sock.close()
+            except (OSError, ValueError) as e:
+                if self._stopped:
+                    return
+                metrics.inc("invalidation.broker_disconnects")
+                print(f"Invalidation broker subscription lost: {e}; retrying in {backoff:.1f}s")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def send(self, payload: bytes):
+        with self._pub_lock:
+            for attempt in range(2):
+                try:
+                    if self._pub is None:
+                        self._pub = self._connect(timeout=self.timeout)
+                    sock, f = self._pub
+                    sock.sendall(self._command("PUBLISH", self.channel, payload))
+                    self._read_reply(f)
+                    return
+                except (OSError, ValueError):
+                    if self._pub is not None:
+                        self._pub[0].close()
+                        self._pub = None
+            metrics.inc("invalidation.dropped")
+
+    def stop(self):
+        self._stopped = True
+        with self._pub_lock:
+            if self._pub is not None:
+                self._pub[0].close()
+                self._pub = None
+
+
+# --- Bus ---
+
+class InvalidationBus:
+    """
+    Keyed invalidation events shared by every worker (and, with a broker, every host).
+
+    Each key has a version: a value from one process-wide counter, bumped whenever
+    the key is invalidated (locally or by a peer). Caches record the version they
+    read BEFORE fetching and only keep a result while the version is unchanged, so
+    a slow read that raced a write can never put the old row back after the
+    invalidation has been processed.
+
+    Subscribers get (key, data, (previous, new) version) for keys starting with their
+    prefix; `data` is an optional small dict from the writer (e.g. the new status).
+    """
+    def __init__(self, transport, max_keys: int = 100_000):
+        self.transport = transport
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._counter = count(1)
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._floor = 0  # version reported for keys not in the table
+        self._handlers: List[Tuple[str, Handler]] = []
+        self._origin: Optional[str] = None
+        self._origin_pid: Optional[int] = None
+        self.started = False
+
+    @property
+    def origin(self) -> str:
+        # Re-derived after fork so every worker has its own identity
+        if self._origin_pid != os.getpid():
+            self._origin = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+            self._origin_pid = os.getpid()
+        return self._origin
+
+    def start(self):
+        if self.started:
+            return
+        self.transport.start(self._on_message, self.reset)
+        self.started = True
+
+    def stop(self):
+        if self.started:
+            self.transport.stop()
+            self.started = False
+
+    def subscribe(self, prefix: str, handler: Handler):
+        self._handlers.append((prefix, handler))
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            return self._versions.get(key, self._floor)
+
+    def publish(self, *keys: str, data: Optional[Dict[str, Any]] = None):
+        """
+        Invalidates `keys` here right away, then tells every other worker.
+        """
+        keys = [k for k in keys if k]
+        if not keys:
+            return
+        self._apply(keys, data)
+        metrics.inc("invalidation.published")
+        payload = json.dumps({"o": self.origin, "k": keys, "d": data}, separators=(",", ":"), default=str)
+        try:
+            self.transport.send(payload.encode())
+        except Exception as e:
+            metrics.inc("invalidation.dropped")
+            print(f"Invalidation publish failed: {e}")
+
+    def reset(self):
+        """
+        Missed messages are possible (broker reconnect): treat every key as changed.
+        """
+        with self._lock:
+            self._floor = next(self._counter)
+            self._versions.clear()
+        metrics.inc("invalidation.resets")
+
+    def _on_message(self, payload: bytes):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("o") == self.origin:
+            return  # our own publish echoed back by the broker
+        metrics.inc("invalidation.received")
+        self._apply(message.get("k") or [], message.get("d"))
+
+    def _apply(self, keys: List[str], data: Optional[Dict[str, Any]]):
+        changes = {}
+        with self._lock:
+            for key in keys:
+                previous = self._versions.get(key, self._floor)
+                self._versions[key] = next(self._counter)
+                self._versions.move_to_end(key)
+                changes[key] = (previous, self._versions[key])
+            while len(self._versions) > self.max_keys:
+                # Forgetting a key must not make older cache entries valid again
+                _, evicted = self._versions.popitem(last=False)
+                self._floor = max(self._floor, evicted)
+        for key in keys:
+            for prefix, handler in self._handlers:
+                if key.startswith(prefix):
+                    try:
+                        handler(key, data, changes[key])
+                    except Exception as e:
+                        print(f"Invalidation handler for {prefix} failed: {e}")
+
+
+class VersionedCache:
+    """
+    TTL + LRU cache whose entries die as soon as their key is invalidated on the bus.
+
+        version = cache.begin(key)      # before reading the database
+        value = fetch()
+        cache.put(key, value, version)  # dropped if the key changed meanwhile
+    """
+    def __init__(self, name: str, bus: InvalidationBus, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.bus = bus
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()  # key -> (value, version, expires)
+        metrics.register_gauge(f"cache.{name}.entries", lambda: len(self._entries))
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def begin(self, key: str) -> int:
+        return self.bus.version(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, version, expires = entry
+            if version == self.bus.version(key) and time.monotonic() < expires:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                metrics.inc(f"cache.{self.name}.hits")
+                return value
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+        metrics.inc(f"cache.{self.name}.misses")
+        return None
+
+    def update(self, key: str, fn: Callable[[Any], Any], change: Tuple[int, int]):
+        """
+        For bus handlers: instead of dropping the entry, rewrites it in place
+        (or keeps it as is, for a change that can't affect it) and carries it to
+        the new version. Only an entry that was current right before this change qualifies;
+        anything else (already stale, or handlers running out of order) is dropped.
+        """
+        previous, version = change
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            value, entry_version, expires = entry
+            if entry_version == previous:
+                self._entries[key] = (fn(value), version, expires)
+            else:
+                del self._entries[key]
+
+    def put(self, key: str, value: Any, version: int):
+        if not self.enabled:
+            return
+        if version != self.bus.version(key):
+            metrics.inc(f"cache.{self.name}.stale_fills")
+            return
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def build_transport(kind: str):
+    if kind == "unix":
+        return UnixSocketTransport(
+            settings.INVALIDATION_SOCKET_DIR or os.path.join(tempfile.gettempdir(), "shipment-invalidation"),
+            send_timeout=settings.INVALIDATION_SEND_TIMEOUT_MS / 1000
+        )
+    if kind == "redis":
+        return RedisTransport(settings.INVALIDATION_REDIS_URL, settings.INVALIDATION_CHANNEL)
+    if kind == "local":
+        return LocalTransport()
+    raise ValueError(f"Unknown INVALIDATION_TRANSPORT: {kind}")
+
+
+invalidation_bus = InvalidationBus(build_transport(settings.INVALIDATION_TRANSPORT), settings.INVALIDATION_MAX_KEYS)
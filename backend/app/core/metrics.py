@@ -0,0 +1,36 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry.
+    Counters are incremented by the code paths they describe; gauges are callables
+    sampled when a snapshot is taken. Served as JSON by GET /metrics.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def inc(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def register_gauge(self, name: str, fn: Callable[[], Any]):
+        self._gauges[name] = fn
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(sorted(self._counters.items()))
+        gauges = {}
+        for name, fn in sorted(self._gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {"counters": counters, "gauges": gauges}
+
+
+metrics = Metrics()
@@ -0,0 +1,177 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Request priorities (higher = shed last)
+PRIORITY_PUBLIC = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_STAFF = 2
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by client (IP or API key).
+    The key table is an LRU capped at `max_keys`: an evicted key simply restarts
+    with a full bucket, so memory stays bounded under scraper IP churn.
+    """
+    def __init__(self, rate_per_sec: float, burst: int, max_keys: int):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, last)
+
+    def take(self, key: str) -> Tuple[bool, float]:
+        """
+        Consumes one token. Returns (allowed, retry_after_seconds).
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (1 - tokens) / self.rate
+        return allowed, retry_after
+
+
+class LoadShedder:
+    """
+    Concurrency-based admission. Each priority class may only start work while the
+    number of in-flight requests is below its own ceiling, so public traffic is shed
+    first and partner/admin traffic keeps the remaining headroom.
+    """
+    def __init__(self, max_inflight: int, public_fraction: float, default_fraction: float):
+        self.inflight = 0
+        self._lock = threading.Lock()
+        self.limits = {
+            PRIORITY_PUBLIC: max(1, int(max_inflight * public_fraction)),
+            PRIORITY_DEFAULT: max(1, int(max_inflight * default_fraction)),
+            PRIORITY_STAFF: max_inflight,
+        }
+        self.shed = {PRIORITY_PUBLIC: 0, PRIORITY_DEFAULT: 0, PRIORITY_STAFF: 0}
+
+    def try_acquire(self, priority: int) -> bool:
+        with self._lock:
+            if self.inflight >= self.limits[priority]:
+                self.shed[priority] += 1
+                return False
+            self.inflight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+
+
+def classify_request(path: str) -> int:
+    prefix = settings.API_V1_STR
+    if path.startswith(f"{prefix}/partner") or path.startswith(f"{prefix}/admin"):
+        return PRIORITY_STAFF
+    if path.startswith(f"{prefix}/track"):
+        return PRIORITY_PUBLIC
+    return PRIORITY_DEFAULT
+
+
+def client_key(request: Request) -> str:
+    """
+    Rate-limit identity: a REGISTERED API key (TRACKING_API_KEYS), otherwise client IP.
+    Unknown keys fall back to the IP so scrapers can't mint fresh buckets.
+    X-Forwarded-For is only honoured behind a trusted proxy (TRUST_FORWARDED_FOR), and
+    then only the hop our own proxies appended (FORWARDED_TRUSTED_HOPS from the right):
+    the leftmost entries are whatever the client sent.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key and api_key in _registered_api_keys:
+        return f"key:{api_key}"
+    if settings.TRUST_FORWARDED_FOR:
+        hops = [
+            hop.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for hop in header.split(",") if hop.strip()
+        ]
+        trusted = max(1, settings.FORWARDED_TRUSTED_HOPS)
+        if len(hops) >= trusted:
+            return f"ip:{hops[-trusted]}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+_registered_api_keys = settings.tracking_api_keys
+
+# Limiters are per process. The kernel spreads connections across the
+# SERVE_WORKERS processes sharing the socket, so each enforces its share of the
+# configured server-wide budgets.
+_workers = max(1, settings.SERVE_WORKERS)
+ip_limiter = TokenBucketLimiter(
+    settings.RATE_LIMIT_PUBLIC_PER_MIN / 60 / _workers,
+    max(1, settings.RATE_LIMIT_PUBLIC_BURST // _workers),
+    settings.RATE_LIMIT_MAX_KEYS
+)
+api_key_limiter = TokenBucketLimiter(
+    settings.RATE_LIMIT_API_KEY_PER_MIN / 60 / _workers,
+    max(1, settings.RATE_LIMIT_API_KEY_BURST // _workers),
+    settings.RATE_LIMIT_MAX_KEYS
+)
+load_shedder = LoadShedder(
+    max(1, settings.LOAD_SHED_MAX_INFLIGHT // _workers),
+    settings.LOAD_SHED_PUBLIC_FRACTION,
+    settings.LOAD_SHED_DEFAULT_FRACTION
+)
+
+metrics.register_gauge("load_shed.inflight", lambda: load_shedder.inflight)
+metrics.register_gauge("load_shed.shed", lambda: {
+    "public": load_shedder.shed[PRIORITY_PUBLIC],
+    "default": load_shedder.shed[PRIORITY_DEFAULT],
+    "staff": load_shedder.shed[PRIORITY_STAFF],
+})
+
+
+class TrafficControlMiddleware(BaseHTTPMiddleware):
+    """
+    1. Token-bucket rate limit on public routes (429 + Retry-After)
+    2. Priority load shedding on all API routes (503 + Retry-After)
+    Rejections happen before any DB work or auth call.
+    """
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if not path.startswith(settings.API_V1_STR) or path.endswith("/health"):
+            return await call_next(request)
+
+        priority = classify_request(path)
+
+        if priority == PRIORITY_PUBLIC and settings.RATE_LIMIT_ENABLED:
+            key = client_key(request)
+            limiter = api_key_limiter if key.startswith("key:") else ip_limiter
+            allowed, retry_after = limiter.take(key)
+            if not allowed:
+                metrics.inc("rate_limit.rejected")
+                return JSONResponse(
+                    status_code=429,
+                    content={"detail": "Rate limit exceeded"},
+                    headers={"Retry-After": str(math.ceil(retry_after))}
+                )
+
+        if not load_shedder.try_acquire(priority):
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Service overloaded, please retry"},
+                headers={"Retry-After": "1"}
+            )
+        try:
+            return await call_next(request)
+        finally:
+            load_shedder.release()
@@ -0,0 +1,229 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from postgrest import APIError
+from supabase import Client
+from supabase_auth.errors import AuthError, AuthRetryableError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# PostgREST could not reach / talk to Postgres
+_POSTGREST_CONNECTION_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Supabase call timed out or its circuit is open. Surfaced to clients as 503.
+    """
+    status_code = 503
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Only transport errors, timeouts and 5xx-class responses count against a breaker.
+    Client errors (bad filter, no rows for .single(), invalid JWT) mean the upstream is healthy.
+    """
+    if isinstance(exc, (httpx.HTTPError, UpstreamUnavailable, AuthRetryableError)):
+        return True
+    if isinstance(exc, APIError):
+        code = str(exc.code or "")
+        return code in _POSTGREST_CONNECTION_CODES or code.startswith("5")
+    if isinstance(exc, AuthError):
+        return (getattr(exc, "status", 0) or 0) >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive upstream failures.
+    open -> half_open after `reset_timeout` seconds; exactly one probe call is let through.
+    half_open -> closed on probe success, back to open on probe failure.
+    """
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    metrics.inc(f"db.breaker_opened:{self.name}")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+# Calls run here so the caller can stop waiting at the deadline.
+# (The abandoned HTTP request is still bounded by the httpx client timeout.)
+_executor = ThreadPoolExecutor(max_workers=settings.DB_CALL_MAX_WORKERS, thread_name_prefix="db-call")
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name, settings.DB_BREAKER_FAILURE_THRESHOLD, settings.DB_BREAKER_RESET_SECONDS
+            )
+        return breaker
+
+
+def guarded_call(name: str, fn: Callable[[], Any], timeout: float, hedge_after: Optional[float] = None) -> Any:
+    """
+    Runs `fn` behind the `name` breaker with a deadline.
+    With `hedge_after`, a duplicate call starts if the first hasn't answered by then and
+    the first response wins. Only use it for idempotent reads.
+    """
+    breaker = get_breaker(name)
+    if not breaker.allow():
+        metrics.inc(f"db.breaker_rejected:{name}")
+        raise UpstreamUnavailable(f"{name} is unavailable (circuit open)")
+
+    metrics.inc(f"db.calls:{name}")
+    deadline = time.monotonic() + timeout
+    pending = {_executor.submit(fn)}
+    hedged = False
+    last_error: Optional[BaseException] = None
+
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        wait_for = remaining
+        if hedge_after is not None and not hedged:
+            wait_for = min(remaining, max(0.0, hedge_after - (timeout - remaining)))
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            exc = future.exception()
+            if exc is None:
+                breaker.record_success()
+                if hedged:
+                    metrics.inc(f"db.hedge_completed:{name}")
+                return future.result()
+            last_error = exc
+            if not is_upstream_failure(exc):
+                # The upstream answered; a 4xx is the real result
+                breaker.record_success()
+                raise exc
+
+        if not done and hedge_after is not None and not hedged:
+            hedged = True
+            metrics.inc(f"db.hedged:{name}")
+            pending.add(_executor.submit(fn))
+
+    if last_error is not None and not pending:
+        breaker.record_failure()
+        metrics.inc(f"db.failures:{name}")
+        raise UpstreamUnavailable(f"{name} failed: {last_error}") from last_error
+
+    breaker.record_failure()
+    metrics.inc(f"db.timeouts:{name}")
+    raise UpstreamUnavailable(f"{name} timed out after {timeout:.1f}s")
+
+
+class _GuardedBuilder:
+    """
+    Wraps a postgrest request builder. Every chained call returns another wrapper, and
+    .execute() goes through guarded_call with a read or write deadline chosen by HTTP
+    method. Reads may be hedged.
+    """
+    def __init__(self, builder: Any, name: str):
+        self._builder = builder
+        self._name = name
+
+    def _wrap(self, value: Any) -> Any:
+        if hasattr(value, "execute") or hasattr(value, "select"):
+            return _GuardedBuilder(value, self._name)
+        return value
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._builder, attr)
+        if attr == "execute":
+            return self._execute
+        if callable(value):
+            def chained(*args, **kwargs):
+                return self._wrap(value(*args, **kwargs))
+            return chained
+        return self._wrap(value)
+
+    def _execute(self):
+        is_read = self._builder.request.http_method in ("GET", "HEAD")
+        if is_read:
+            hedge = settings.DB_HEDGE_AFTER_MS / 1000 if settings.DB_HEDGE_READS else None
+            return guarded_call(self._name, self._builder.execute, settings.DB_READ_TIMEOUT_SECONDS, hedge)
+        return guarded_call(self._name, self._builder.execute, settings.DB_WRITE_TIMEOUT_SECONDS)
+
+
+class _GuardedAuth:
+    """
+    Wraps supabase.auth; every method call runs behind the `auth` breaker.
+    """
+    def __init__(self, auth: Any):
+        self._auth = auth
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._auth, attr)
+        if not callable(value):
+            return value
+
+        def guarded(*args, **kwargs):
+            return guarded_call("auth", lambda: value(*args, **kwargs), settings.AUTH_TIMEOUT_SECONDS)
+        return guarded
+
+
+class ResilientClient:
+    """
+    Drop-in wrapper around the Supabase client: `.table(name)` gets a per-table breaker
+    ("table:<name>"), `.rpc(fn)` a per-function one ("rpc:<fn>"), `.auth` goes through
+    the "auth" breaker, and everything else passes through untouched.
+    """
+    def __init__(self, client: Client):
+        self._client = client
+        self.auth = _GuardedAuth(client.auth)
+
+    def table(self, name: str) -> _GuardedBuilder:
+        return _GuardedBuilder(self._client.table(name), f"table:{name}")
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> _GuardedBuilder:
+        return _GuardedBuilder(self._client.rpc(fn, params or {}, **kwargs), f"rpc:{fn}")
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._client, attr)
+
+
+metrics.register_gauge("db.breakers", lambda: {
+    name: {"state": b.state, "failures": b.failures} for name, b in list(_breakers.items())
+})
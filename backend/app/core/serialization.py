@@ -0,0 +1,106 @@
+import re
+import typing
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, PlainSerializer, TypeAdapter
+from typing_extensions import Annotated, TypedDict
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the stdlib encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when installed. Pre-serialized bytes are sent as-is.
+    """
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def _wire_typed_dict(model: type) -> type:
+    """
+    TypedDict mirror of a response model (all keys optional, leaf values Any).
+    Serializing a dict through it keeps only the model's keys, recursively,
+    without validating or coercing the values.
+    """
+    fields = {name: _wire_type(field.annotation) for name, field in model.model_fields.items()}
+    return TypedDict(f"{model.__name__}Wire", fields, total=False)
+
+
+_TIMESTAMP = re.compile(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d{1,6}))?(Z|[+-]\d\d:\d\d)?")
+
+
+def _wire_datetime(value: Any) -> Any:
+    """
+    Timestamps as pydantic writes them ('Z' for UTC, 6-digit fractions, none when
+    zero), so raw Supabase strings ('+00:00', trimmed fractions) match the
+    validated path. Anything else goes through datetime parsing.
+    """
+    if isinstance(value, str):
+        match = _TIMESTAMP.fullmatch(value)
+        if match is None:
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return value
+        else:
+            stamp, fraction, offset = match.groups()
+            fraction = (fraction or "").ljust(6, "0")
+            return (
+                stamp
+                + ("" if fraction == "000000" else "." + fraction)
+                + ("Z" if offset == "+00:00" else offset or "")
+            )
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    return value
+
+
+_WireDatetime = Annotated[Any, PlainSerializer(_wire_datetime)]
+
+
+def _wire_type(annotation: Any) -> Any:
+    if annotation is datetime:
+        return _WireDatetime
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _wire_typed_dict(annotation)
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in (list, List) and args:
+        return List[_wire_type(args[0])]
+    if origin is typing.Union:
+        non_null = [a for a in args if a is not type(None)]
+        if len(non_null) == 1:
+            return Optional[_wire_type(non_null[0])]
+    if origin in (dict, Dict) and len(args) == 2:
+        return Dict[str, _wire_type(args[1])]
+    return Any
+
+
+class TrustedSerializer:
+    """
+    Precompiled serializer for service output we already shaped ourselves.
+    Skips response_model validation: the TypeAdapter only filters keys to the schema
+    and encodes to JSON in pydantic-core, and the bytes go out via FastJSONResponse.
+    Same JSON as response_model_exclude_unset for dict input; datetime fields are
+    rewritten to pydantic's format, other values are sent as the service returned them.
+    """
+    def __init__(self, annotation: Any):
+        self.adapter = TypeAdapter(_wire_type(annotation))
+
+    def dump_json(self, data: Any) -> bytes:
+        return self.adapter.dump_json(data)
+
+    def response(self, data: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+        return FastJSONResponse(self.dump_json(data), status_code=status_code, headers=headers)
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution; everyone gets
+    the leader's result (or exception). Nothing is kept once the call finishes; this
+    only deduplicates work that is in flight at the same moment.
+
+    Sync callers (threadpool endpoints) block on an Event; async callers await a
+    future and hold no thread while waiting. Both kinds share the same flights.
+    Results are shared objects: callers must not mutate them.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        metrics.register_gauge(f"singleflight.{name}.in_flight", lambda: len(self._calls))
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _finish(self, key: Hashable, call: _Call, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+            call.result, call.error = result, error
+            call.done.set()
+            waiters, call.async_waiters = call.async_waiters, []
+        metrics.inc(f"singleflight.{self.name}.executed")
+        if call.followers:
+            metrics.inc(f"singleflight.{self.name}.coalesced", call.followers)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    @staticmethod
+    def _outcome(call: _Call) -> Any:
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            return self._outcome(call)
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        `fn` is blocking; a leader runs it in the threadpool.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            with self._lock:
+                pending = not call.done.is_set()
+                if pending:
+                    call.async_waiters.append((loop, future))
+            if pending:
+                await future
+            return self._outcome(call)
+        # Shielded: a leader whose client disconnects must not fail its followers
+        task = asyncio.ensure_future(run_in_threadpool(fn))
+        task.add_done_callback(lambda t: self._finish(
+            key, call,
+            result=None if t.cancelled() or t.exception() else t.result(),
+            error=asyncio.CancelledError() if t.cancelled() else t.exception()
+        ))
+        return await asyncio.shield(task)
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():  # done = waiter was cancelled (client went away)
+        future.set_result(None)
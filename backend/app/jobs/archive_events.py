@@ -0,0 +1,109 @@
+"""
+Moves shipment_events of shipments closed (DELIVERED/RETURNED) more than N days ago
+from the hot table into the local cold archive.
+
+Usage: python -m app.jobs.archive_events [--days 90] [--page-size 500]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+from supabase import Client, create_client
+
+from app.core.config import settings
+from app.services.event_archive import event_archive, EVENT_COLUMNS
+from app.services.batching import chunks, IN_FILTER_CHUNK, PAGE_SIZE
+
+
+def _read_events(supabase: Client, shipment_ids: List[str], page_size: int = PAGE_SIZE) -> List[Dict[str, Any]]:
+    """
+    All events of the shipments, in keyset pages on (shipment_id, created_at, id)
+    so the server's row cap can never truncate what gets archived (and deleted).
+    """
+    events: List[Dict[str, Any]] = []
+    while True:
+        query = supabase.table("shipment_events")\
+            .select(", ".join(EVENT_COLUMNS))\
+            .in_("shipment_id", shipment_ids)
+        if events:
+            last = events[-1]
+            sid, created_at, eid = last['shipment_id'], last['created_at'], last['id']
+            query = query.or_(
+                f'shipment_id.gt."{sid}",'
+                f'and(shipment_id.eq."{sid}",created_at.gt."{created_at}"),'
+                f'and(shipment_id.eq."{sid}",created_at.eq."{created_at}",id.gt."{eid}")'
+            )
+        page = query.order("shipment_id").order("created_at").order("id").limit(page_size).execute().data or []
+        events.extend(page)
+        if len(page) < page_size:
+            return events
+
+
+def archive_closed_shipment_events(supabase: Client, older_than_days: int, page_size: int = 500) -> Dict[str, Any]:
+    """
+    Per page of candidate shipments:
+    1. write their events to one segment per close-month
+    2. point shipments.events_archive_ref at the segment
+    3. delete exactly the hot rows that went into the segment, by id
+    A crash between steps leaves duplicates (readers de-dupe by id), never a loss.
+    Events added after the read (e.g. a forced status change) stay in the hot
+    table and are merged with the archive on read.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    stats = {"shipments": 0, "events": 0, "segments": []}
+    last_id = None
+
+    while True:
+        query = supabase.table("shipments")\
+            .select("id, closed_at")\
+            .in_("status", ["DELIVERED", "RETURNED"])\
+            .lt("closed_at", cutoff)\
+            .is_("events_archive_ref", "null")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        res = query.order("id").limit(page_size).execute()
+        shipments = res.data
+        if not shipments:
+            break
+        last_id = shipments[-1]['id']
+
+        # Partition by the month the shipment closed
+        by_month: Dict[str, List[str]] = {}
+        for s in shipments:
+            by_month.setdefault(s['closed_at'][:7], []).append(s['id'])
+
+        for month, shipment_ids in by_month.items():
+            events = []
+            for chunk in chunks(shipment_ids, IN_FILTER_CHUNK):
+                events.extend(_read_events(supabase, chunk))
+
+            ref = event_archive.write_segment(month, events)
+            for chunk in chunks(shipment_ids, IN_FILTER_CHUNK):
+                supabase.table("shipments")\
+                    .update({"events_archive_ref": ref})\
+                    .in_("id", chunk)\
+                    .execute()
+            # Only what the segment holds: events written after the read stay hot
+            for chunk in chunks([e['id'] for e in events], IN_FILTER_CHUNK):
+                supabase.table("shipment_events").delete().in_("id", chunk).execute()
+
+            stats["shipments"] += len(shipment_ids)
+            stats["events"] += len(events)
+            stats["segments"].append(ref)
+
+        if len(shipments) < page_size:
+            break
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive events of long-closed shipments")
+    parser.add_argument("--days", type=int, default=settings.EVENT_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+
+    client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    result = archive_closed_shipment_events(client, args.days, args.page_size)
+    print(f"Archived {result['events']} events from {result['shipments']} shipments "
+          f"into {len(result['segments'])} segments")
@@ -1,15 +1,78 @@
-from fastapi import FastAPI
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from supabase import create_client
 
 from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.rate_limit import TrafficControlMiddleware
+from app.core.resilience import UpstreamUnavailable
 from app.api.v1.routes import api_router
+from app.services.event_archive import ArchiveSegmentMissing
+from app.services.search_index import shipment_search_index
+
+
+def _build_search_index():
+    try:
+        client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        count = shipment_search_index.build(client, settings.SEARCH_INDEX_PAGE_SIZE)
+        print(f"Search index ready: {count} shipments")
+    except Exception as e:
+        print(f"Search index build failed: {e}")
+
+
+def _catch_up_search_index():
+    try:
+        client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        count = shipment_search_index.catch_up(
+            client, settings.SEARCH_INDEX_PAGE_SIZE, settings.SEARCH_INDEX_CATCH_UP_SKEW_SECONDS
+        )
+        print(f"Search index caught up: {count} shipments changed since snapshot")
+    except Exception as e:
+        print(f"Search index catch-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Per worker (after fork): receive other workers' invalidations
+    invalidation_bus.start()
+    # The bus keeps this process's search index current from here on, so a snapshot
+    # forked from the master only needs the rows changed before that; without one,
+    # build it. Either way in the background so startup isn't blocked.
+    if settings.SEARCH_INDEX_ENABLED and settings.SUPABASE_URL:
+        if shipment_search_index.ready:
+            target, name = _catch_up_search_index, "search-index-catch-up"
+        else:
+            target, name = _build_search_index, "search-index-build"
+        threading.Thread(target=target, name=name, daemon=True).start()
+    yield
+    invalidation_bus.stop()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    redirect_slashes=False
+    redirect_slashes=False,
+    lifespan=lifespan
 )
 
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    # Supabase timed out or its circuit is open: tell clients to back off
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+@app.exception_handler(ArchiveSegmentMissing)
+async def archive_segment_missing_handler(request: Request, exc: ArchiveSegmentMissing):
+    # Archived history is unreadable (volume not mounted / segment lost): fail loudly
+    print(str(exc))
+    return JSONResponse(status_code=500, content={"detail": "Archived shipment events are unavailable"})
+
+# Rate limiting + load shedding (added first so CORS wraps its 429/503 responses)
+app.add_middleware(TrafficControlMiddleware)
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -18,6 +81,8 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Incremental event refresh cursor
+        expose_headers=["X-Next-Cursor"],
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from enum import Enum
 
 # Shared Enums (Mirroring DB)
@@ -64,6 +64,51 @@ class ShipmentDetail(BaseModel):
     class Config:
         from_attributes = True
 
+# Sparse Reads (fields= / include=): every field optional, only requested ones are set
+class ShipmentEventPartial(BaseModel):
+    status: Optional[ShipmentStatus] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class ShipmentItemDetail(BaseModel):
+    description: str
+    quantity: int = 1
+    weight_kg: Optional[float] = None
+    length_cm: Optional[float] = None
+    width_cm: Optional[float] = None
+    height_cm: Optional[float] = None
+
+class ShipmentDetailPartial(BaseModel):
+    id: Optional[str] = None
+    tracking_id: Optional[str] = None
+    status: Optional[ShipmentStatus] = None
+    user_id: Optional[str] = None
+    total_weight_kg: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    addresses: Optional[List[ShipmentDetailAddress]] = None
+    events: Optional[List[ShipmentEventPartial]] = None
+    items: Optional[List[ShipmentItemDetail]] = None
+
+    assigned_partner_id: Optional[str] = None # Admin only
+
+# Customer listing
+class ShipmentSummary(BaseModel):
+    id: str
+    tracking_id: str
+    status: ShipmentStatus
+    created_at: datetime
+    destination_city: Optional[str] = None
+    latest_event: Optional[ShipmentEventPartial] = None
+
+class ShipmentListResponse(BaseModel):
+    data: List[ShipmentSummary]
+    next_cursor: Optional[str] = None # Pass as `cursor` for the next page; null on the last page
+    status_counts: Dict[str, int] # All of the user's shipments, not just this page
+    total: int
+
 # Creation Models
 class AddressCreate(BaseModel):
     contact_name: str
@@ -103,10 +148,35 @@ class ShipmentScanRequest(BaseModel):
     description: Optional[str] = None
     location: Optional[str] = None
 
+class RunSheetStop(BaseModel):
+    sequence: Optional[int] = None
+    shipment_id: str
+    tracking_id: str
+    contact_name: Optional[str] = None
+    contact_phone: Optional[str] = None
+    address_line_1: Optional[str] = None
+    address_line_2: Optional[str] = None
+    city: Optional[str] = None
+    pincode: Optional[str] = None
+    distance_from_previous_km: Optional[float] = None
+
+class RunSheetResponse(BaseModel):
+    stops: List[RunSheetStop]
+    unlocated: List[RunSheetStop] # Pincode not in centroid data; deliver in any order
+    total_distance_km: float
+    computed_in_ms: float
+
 # Admin Operations
 class ShipmentForceStatusRequest(BaseModel):
     status: ShipmentStatus
     reason: str
 
+class AutoDispatchRequest(BaseModel):
+    pincode_prefix: str = Field(..., min_length=1, max_length=6, pattern=r"^[0-9]+$") # Region, e.g. "5600"
+    address_type: AddressType = AddressType.PICKUP # Which address decides the zone
+    partner_ids: Optional[List[str]] = None # Restrict to these partners
+    limit: int = Field(5000, ge=1, le=20000)
+    dry_run: bool = False
+
 class ShipmentAdminListResponse(ShipmentDetail):
     assigned_partner_id: Optional[str] = None
@@ -0,0 +1,300 @@
+"""
+Production entry point: pre-forking uvicorn workers sharing one listening socket.
+
+The master imports the app, loads read-only reference data (pincode centroids) and
+builds the admin search index once BEFORE forking, so workers share those pages
+copy-on-write instead of each loading its own copy. The index is mutable and only
+workers receive invalidation-bus messages, so each worker subscribes first and then
+catches up on the shipments updated since the master's snapshot (see
+ShipmentSearchIndex.catch_up); before forking, the master refreshes a snapshot older
+than SEARCH_INDEX_REFRESH_SECONDS the same way. Workers are recycled after
+SERVE_MAX_REQUESTS (+ jitter) requests; uvicorn stops accepting, drains in-flight
+requests (up to SERVE_GRACEFUL_TIMEOUT_SECONDS) and exits, and the master forks a
+replacement from the already-warm image.
+
+Usage: python -m app.serve [--workers 4] [--port 8000] [--max-requests 10000]
+
+Signals (master): SIGTERM/SIGINT drain all workers and exit, SIGHUP recycles
+workers one at a time.
+
+Rate limits and load-shed ceilings are enforced per process, so each worker gets
+1/workers of the configured budget (see app.core.rate_limit).
+"""
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def memory_usage() -> Dict[str, int]:
+    """
+    Resident memory of this process in KiB, split into pages still shared with the
+    master (copy-on-write) and private ones. Linux only; elsewhere just max RSS.
+    """
+    try:
+        usage = {}
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    usage[key] = int(rest.split()[0])
+        return {
+            "rss_kb": usage.get("Rss", 0),
+            "shared_kb": usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0),
+            "private_kb": usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0),
+        }
+    except OSError:
+        import resource
+        return {"rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def _format_memory(usage: Dict[str, int]) -> str:
+    return ", ".join(f"{k[:-3]}={v / 1024:.1f}MiB" for k, v in usage.items())
+
+
+def _search_index_enabled() -> bool:
+    return settings.SEARCH_INDEX_ENABLED and bool(settings.SUPABASE_URL)
+
+
+def preload():
+    """
+    Everything workers should inherit instead of loading themselves.
+    """
+    started = time.perf_counter()
+    from app.main import _build_search_index
+    from app.services.route_optimizer import preload_pincode_data
+
+    print(f"Preloaded {preload_pincode_data()} pincode centroids")
+    if _search_index_enabled():
+        # Workers catch up from this snapshot instead of each building their own
+        _build_search_index()
+
+    # Move everything loaded so far out of the GC's reach: collections in the
+    # workers would otherwise touch (and un-share) these pages
+    gc.collect()
+    gc.freeze()
+    print(f"Master [{os.getpid()}] preloaded in {(time.perf_counter() - started) * 1000:.0f}ms "
+          f"({_format_memory(memory_usage())})")
+
+
+class _WorkerServer(uvicorn.Server):
+    """
+    uvicorn server that reports its startup time and memory once it is accepting.
+    """
+    def __init__(self, config: uvicorn.Config, forked_at: float):
+        super().__init__(config)
+        self.forked_at = forked_at
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        startup_ms = (time.perf_counter() - self.forked_at) * 1000
+        print(f"Worker [{os.getpid()}] ready in {startup_ms:.0f}ms ({_format_memory(memory_usage())}), "
+              f"recycles after {self.config.limit_max_requests or 'unlimited'} requests")
+        metrics.register_gauge("worker", lambda: {
+            "pid": os.getpid(),
+            "startup_ms": round(startup_ms, 1),
+            "requests": self.server_state.total_requests,
+            "max_requests": self.config.limit_max_requests,
+            **memory_usage(),
+        })
+
+
+def refresh_snapshot():
+    """
+    Catches the master's search index up when its snapshot has aged, so a worker
+    forked from it has little to re-read. Runs between forks only.
+    """
+    from app.main import _catch_up_search_index
+    from app.services.search_index import shipment_search_index
+
+    if not _search_index_enabled() or not shipment_search_index.ready:
+        return
+    if time.time() - shipment_search_index.snapshot_at < settings.SEARCH_INDEX_REFRESH_SECONDS:
+        return
+    _catch_up_search_index()
+    gc.freeze()
+
+
+def _run_worker(sock: socket.socket, max_requests: int, jitter: int, graceful_timeout: int):
+    forked_at = time.perf_counter()
+    # Drop the master's handlers; uvicorn installs its own (SIGTERM/SIGINT = graceful stop)
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    random.seed()
+
+    from app.main import app
+    limit = max_requests + random.randint(0, jitter) if max_requests > 0 else None
+    config = uvicorn.Config(
+        app,
+        limit_max_requests=limit,
+        timeout_graceful_shutdown=graceful_timeout,
+        proxy_headers=settings.TRUST_FORWARDED_FOR,
+    )
+    _WorkerServer(config, forked_at).run(sockets=[sock])
+
+
+class Arbiter:
+    """
+    Master process: owns the listening socket, keeps `workers` children alive and
+    restarts them when they exit (recycled or crashed).
+    """
+    def __init__(self, host: str, port: int, workers: int, max_requests: int, jitter: int, graceful_timeout: int):
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.max_requests = max_requests
+        self.jitter = jitter
+        self.graceful_timeout = graceful_timeout
+        self.workers: Dict[int, float] = {}  # pid -> spawned at (monotonic)
+        self.sock: Optional[socket.socket] = None
+        self._stopping = False
+        self._recycle_requested = False
+        self._quick_failures = 0
+
+    def bind(self):
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.sock = sock
+        print(f"Listening on http://{self.host}:{self.port} with {self.num_workers} workers")
+
+    def spawn(self):
+        refresh_snapshot()
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.sock, self.max_requests, self.jitter, self.graceful_timeout)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException as e:
+                print(f"Worker [{os.getpid()}] crashed: {e}")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_hup(self, signum, frame):
+        self._recycle_requested = True
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            spawned_at = self.workers.pop(pid, None)
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping or spawned_at is None:
+                continue
+            lived = time.monotonic() - spawned_at
+            # uvicorn re-raises SIGTERM after a graceful stop, so -SIGTERM is a clean exit
+            if code not in (0, -signal.SIGTERM) and lived < 5:
+                # Failing on boot: back off instead of fork-looping
+                self._quick_failures += 1
+                delay = min(2 ** self._quick_failures, 30)
+                print(f"Worker [{pid}] exited with {code} after {lived:.1f}s; respawning in {delay}s")
+                time.sleep(delay)
+            else:
+                self._quick_failures = 0
+                print(f"Worker [{pid}] exited with {code} after {lived:.0f}s; respawning")
+
+    def _recycle_all(self):
+        """
+        Rolling restart: replace workers one at a time so capacity never drops by more than one.
+        """
+        self._recycle_requested = False
+        for pid in list(self.workers):
+            if self._stopping:
+                return
+            os.kill(pid, signal.SIGTERM)
+            while pid in self.workers and not self._stopping:
+                self._reap()
+                time.sleep(0.1)
+            self.spawn()
+
+    def _shutdown(self):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            print(f"Worker [{pid}] did not drain in time; killing")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.workers:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self.workers.pop(pid, None)
+        self.sock.close()
+        print("Master shut down")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_hup)
+
+        while not self._stopping:
+            self._reap()
+            if self._recycle_requested:
+                self._recycle_all()
+            while not self._stopping and len(self.workers) < self.num_workers:
+                self.spawn()
+            time.sleep(0.2)
+        self._shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with pre-forked uvicorn workers")
+    parser.add_argument("--host", default=settings.SERVE_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument("--max-requests", type=int, default=settings.SERVE_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.SERVE_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVE_GRACEFUL_TIMEOUT_SECONDS)
+    args = parser.parse_args()
+
+    arbiter = Arbiter(
+        args.host, args.port, args.workers,
+        args.max_requests, args.max_requests_jitter, args.graceful_timeout
+    )
+    # Per-process limiters (built during preload) split their budget by this
+    settings.SERVE_WORKERS = arbiter.num_workers
+    # Bind first so a port clash fails before the preload
+    arbiter.bind()
+    preload()
+    sys.stdout.flush()
+    arbiter.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+from typing import Any, Callable, Dict, Iterator, List
+
+# Keeps `in.(...)` filters well under PostgREST URL limits
+IN_FILTER_CHUNK = 200
+BULK_INSERT_CHUNK = 500
+# PostgREST's default max-rows: larger limits are silently capped to this
+PAGE_SIZE = 1000
+
+
+def chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def pages_by_id(build_query: Callable[[], Any], page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Every row of a select (which must include `id`), fetched in keyset pages on id
+    so no response can be truncated by the server's row cap.
+    `build_query` returns a fresh filtered builder for each page.
+    """
+    last_id = None
+    while True:
+        query = build_query()
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(page_size).execute().data or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
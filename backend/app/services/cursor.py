@@ -0,0 +1,46 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# Keyset cursors over (created_at, id): opaque to clients, stable under inserts.
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Raises ValueError on anything we didn't issue (surfaced as 400). Both parts are
+    validated here: they go into PostgREST filters, where a malformed timestamp or
+    id would only fail inside Postgres (as a 500).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        datetime.fromisoformat(created_at)
+        uuid.UUID(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, row_id
+
+
+def cursor_of(row: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not row:
+        return None
+    return encode_cursor(row['created_at'], row['id'])
+
+
+def after_filter(cursor: Tuple[str, str], descending: bool = False) -> str:
+    """
+    PostgREST or=() filter for rows strictly after the cursor in (created_at, id) order.
+    Values are quoted since timestamps contain ':', '.' and '+'.
+    """
+    created_at, row_id = cursor
+    op = "lt" if descending else "gt"
+    return f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}."{row_id}")'
+
+
+def is_after(row: Dict[str, Any], cursor: Tuple[str, str]) -> bool:
+    return (row.get('created_at') or "", row.get('id') or "") > cursor
@@ -0,0 +1,72 @@
+import heapq
+from typing import Optional, List, Dict, Any, Tuple
+
+
+class LeastLoadedDispatcher:
+    """
+    Heap-based least-loaded assignment with per-partner capacity and pincode zones.
+    One min-heap of (load, partner_id) per service prefix. Entries go stale when a
+    partner's load changes through another prefix, so pops re-check the live load
+    and lazily re-push.
+    """
+    def __init__(self, partners: List[Dict[str, Any]]):
+        # partners: {id, capacity, load, service_pincode_prefixes}
+        self.capacity: Dict[str, int] = {}
+        self.load: Dict[str, int] = {}
+        self.initial_load: Dict[str, int] = {}
+        self.heaps: Dict[str, List[Tuple[int, str]]] = {}
+        self.prefix_lengths: List[int] = []
+
+        for p in partners:
+            pid = p['id']
+            self.capacity[pid] = p['capacity']
+            self.load[pid] = p.get('load', 0)
+            self.initial_load[pid] = self.load[pid]
+            for prefix in p.get('service_pincode_prefixes') or []:
+                self.heaps.setdefault(prefix, []).append((self.load[pid], pid))
+
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+        self.prefix_lengths = sorted({len(prefix) for prefix in self.heaps}, reverse=True)
+
+    def _peek(self, prefix: str) -> Optional[Tuple[int, str]]:
+        heap = self.heaps.get(prefix)
+        while heap:
+            load, pid = heap[0]
+            if self.load[pid] >= self.capacity[pid]:
+                heapq.heappop(heap)  # Full: never eligible again in this run
+            elif load != self.load[pid]:
+                heapq.heapreplace(heap, (self.load[pid], pid))
+            else:
+                return heap[0]
+        return None
+
+    def pick(self, pincode: str) -> Optional[str]:
+        """
+        Least-loaded partner among all zones whose prefix matches `pincode`.
+        Ties go to the longest (most specific) prefix, then partner id.
+        """
+        best = None
+        for length in self.prefix_lengths:
+            if length > len(pincode):
+                continue
+            top = self._peek(pincode[:length])
+            if top is not None and (best is None or top[0] < best[0]):
+                best = top
+        if best is None:
+            return None
+        pid = best[1]
+        self.load[pid] += 1
+        return pid
+
+    def load_report(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "partner_id": pid,
+                "capacity": self.capacity[pid],
+                "load_before": self.initial_load[pid],
+                "load_after": self.load[pid],
+                "assigned": self.load[pid] - self.initial_load[pid],
+            }
+            for pid in sorted(self.load, key=lambda p: (-self.load[p], p))
+        ]
@@ -0,0 +1,177 @@
+import bisect
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from app.core.config import settings
+
+EVENT_COLUMNS = ("id", "shipment_id", "status", "description", "location", "created_at")
+
+
+class ArchiveSegmentMissing(Exception):
+    """
+    A shipment points at a segment that is not on disk. Its hot rows were deleted
+    when it was archived, so this is data loss, not an empty history.
+    """
+
+
+class EventArchive:
+    """
+    Cold storage for shipment_events of long-closed shipments.
+
+    Layout (partitioned by the month the shipment closed):
+        <root>/<YYYY-MM>/<segment>.seg       concatenated zlib blocks
+        <root>/<YYYY-MM>/<segment>.idx.json  block offsets + shipment_id ranges
+
+    Each block is columnar (one list per column), rows sorted by shipment_id, so
+    repeated ids/statuses sit next to each other and compress well.
+    Segments are immutable once written; shipments point at theirs via
+    `shipments.events_archive_ref` ('<YYYY-MM>/<segment>').
+    """
+    def __init__(self, root: str, cache_blocks: int = 64, block_rows: int = 2048):
+        # Archived rows are gone from the hot table; a relative root would land in the
+        # (ephemeral) working directory and be lost on redeploy
+        if not os.path.isabs(root):
+            raise ValueError(f"EVENT_ARCHIVE_DIR must be an absolute path on persistent storage, got {root!r}")
+        self.root = Path(root)
+        self.cache_blocks = cache_blocks
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Any, Any]" = OrderedDict()
+
+    # --- Write side (archive job) ---
+
+    def write_segment(self, month: str, events: List[Dict[str, Any]]) -> str:
+        """
+        Writes events as a new segment in the month partition and returns its ref.
+        Files are written to temp names and renamed, so readers never see partial data.
+        """
+        rows = sorted(events, key=lambda e: (e['shipment_id'], e.get('created_at') or ""))
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}-{os.urandom(3).hex()}"
+        partition = self.root / month
+        partition.mkdir(parents=True, exist_ok=True)
+        seg_path = partition / f"{name}.seg"
+        idx_path = partition / f"{name}.idx.json"
+
+        blocks = []
+        offset = 0
+        with open(f"{seg_path}.tmp", "wb") as f:
+            for start in range(0, len(rows), self.block_rows):
+                chunk = rows[start:start + self.block_rows]
+                columns = {col: [r.get(col) for r in chunk] for col in EVENT_COLUMNS}
+                payload = zlib.compress(json.dumps(columns, separators=(",", ":")).encode(), 6)
+                f.write(payload)
+                blocks.append({
+                    "offset": offset,
+                    "length": len(payload),
+                    "rows": len(chunk),
+                    "first": chunk[0]['shipment_id'],
+                    "last": chunk[-1]['shipment_id']
+                })
+                offset += len(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{seg_path}.tmp", seg_path)
+
+        with open(f"{idx_path}.tmp", "w") as f:
+            json.dump({"codec": "zlib", "columns": list(EVENT_COLUMNS), "blocks": blocks}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{idx_path}.tmp", idx_path)
+
+        return f"{month}/{name}"
+
+    # --- Read side ---
+
+    def _cached(self, key, loader):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = loader()
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return value
+
+    def _load_index(self, ref: str) -> Dict[str, Any]:
+        with open(self.root / f"{ref}.idx.json") as f:
+            index = json.load(f)
+        index["firsts"] = [b["first"] for b in index["blocks"]]
+        return index
+
+    def _load_block(self, ref: str, block: Dict[str, Any]) -> Dict[str, List[Any]]:
+        with open(self.root / f"{ref}.seg", "rb") as f:
+            f.seek(block["offset"])
+            payload = f.read(block["length"])
+        return json.loads(zlib.decompress(payload))
+
+    def read_events(self, ref: str, shipment_id: str) -> List[Dict[str, Any]]:
+        """
+        Archived events of one shipment (oldest first).
+        Raises ArchiveSegmentMissing if the segment is not on disk.
+        """
+        try:
+            index = self._cached(("idx", ref), lambda: self._load_index(ref))
+        except FileNotFoundError:
+            raise ArchiveSegmentMissing(f"Event archive segment missing: {self.root / ref} (shipment {shipment_id})")
+
+        events = []
+        # Blocks are sorted by shipment_id; a shipment may straddle adjacent blocks
+        pos = max(bisect.bisect_left(index["firsts"], shipment_id) - 1, 0)
+        for block_no in range(pos, len(index["blocks"])):
+            block = index["blocks"][block_no]
+            if block["first"] > shipment_id:
+                break
+            if block["last"] < shipment_id:
+                continue
+            try:
+                columns = self._cached(("blk", ref, block_no), lambda: self._load_block(ref, block))
+            except FileNotFoundError:
+                raise ArchiveSegmentMissing(f"Event archive segment missing: {self.root / ref} (shipment {shipment_id})")
+            ids = columns["shipment_id"]
+            lo = bisect.bisect_left(ids, shipment_id)
+            hi = bisect.bisect_right(ids, shipment_id)
+            names = index["columns"]
+            for i in range(lo, hi):
+                events.append({col: columns[col][i] for col in names})
+        return events
+
+    def merge_events(
+        self,
+        ref: Optional[str],
+        shipment_id: str,
+        hot_events: List[Dict[str, Any]],
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hot + archived events, de-duplicated by id (an interrupted archive run can leave
+        both copies) and sorted oldest first. `fields` projects archived rows to match
+        a narrower hot select.
+        """
+        if not ref:
+            return hot_events
+        archived = self.read_events(ref, shipment_id)
+        seen = {e.get('id') for e in hot_events if e.get('id')}
+        merged = list(hot_events)
+        for evt in archived:
+            if evt['id'] in seen:
+                continue
+            merged.append({k: evt.get(k) for k in fields} if fields else evt)
+        merged.sort(key=lambda e: e.get('created_at') or "")
+        return merged
+
+
+# Process-wide reader; the block cache is shared across requests
+event_archive = EventArchive(
+    settings.EVENT_ARCHIVE_DIR,
+    cache_blocks=settings.EVENT_ARCHIVE_CACHE_BLOCKS,
+    block_rows=settings.EVENT_ARCHIVE_BLOCK_ROWS
+)
@@ -0,0 +1,108 @@
+from typing import Optional, List, Dict, Any, Iterable, Sequence, Tuple
+
+# Client-facing name -> columns / embedded tables
+SHIPMENT_FIELDS = ("id", "tracking_id", "status", "user_id", "total_weight_kg", "created_at", "updated_at")
+EVENT_FIELDS = ("status", "description", "location", "created_at")
+EMBEDS = {
+    "addresses": "shipment_addresses",
+    "events": "shipment_events",
+    "items": "shipment_items",
+}
+
+# Always fetched: ownership check, archive lookup, event de-dupe/sort. Stripped unless asked for.
+_INTERNAL_COLUMNS = ("id", "user_id", "events_archive_ref")
+_INTERNAL_EVENT_COLUMNS = ("id", "created_at")
+
+
+def parse_csv_param(value: Optional[str]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+class ShipmentProjection:
+    """
+    Sparse fieldset for shipment reads, turned into a PostgREST select on the fly.
+      fields:       top-level shipment columns (+ `extra_fields` such as assigned_partner_id)
+      include:      embedded relations (addresses, events, items)
+      event_fields: columns of each embedded event
+      events_limit: keep only the latest N events
+    None means "everything" for fields/event_fields and `default_include` for include.
+    Unknown names raise ValueError (surfaced as 400).
+    """
+    def __init__(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        include: Optional[Sequence[str]] = None,
+        event_fields: Optional[Sequence[str]] = None,
+        events_limit: Optional[int] = None,
+        default_include: Sequence[str] = ("addresses", "events"),
+        extra_fields: Sequence[str] = ()
+    ):
+        allowed = set(SHIPMENT_FIELDS) | set(extra_fields)
+        self.fields = list(fields) if fields is not None else list(SHIPMENT_FIELDS) + list(extra_fields)
+        self.include = list(include) if include is not None else list(default_include)
+        self.event_fields = list(event_fields) if event_fields is not None else list(EVENT_FIELDS)
+        self.events_limit = events_limit
+
+        self._check("fields", self.fields, allowed)
+        self._check("include", self.include, EMBEDS)
+        self._check("event fields", self.event_fields, EVENT_FIELDS)
+
+    @staticmethod
+    def _check(kind: str, names: Iterable[str], allowed: Iterable[str]):
+        unknown = [n for n in names if n not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown {kind}: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}")
+
+    def key(self) -> Tuple:
+        """
+        Hashable identity, for sharing results between identical requests.
+        """
+        return (tuple(self.fields), tuple(self.include), tuple(self.event_fields), self.events_limit)
+
+    def wants(self, name: str) -> bool:
+        return name in self.fields or name in self.include
+
+    @property
+    def event_columns(self) -> List[str]:
+        return list(dict.fromkeys(list(_INTERNAL_EVENT_COLUMNS) + self.event_fields))
+
+    def select_clause(self) -> str:
+        columns = [c for c in dict.fromkeys(list(_INTERNAL_COLUMNS) + self.fields) if c in SHIPMENT_FIELDS or c in _INTERNAL_COLUMNS]
+        for name in self.include:
+            if name == "events":
+                columns.append(f"shipment_events({', '.join(self.event_columns)})")
+            else:
+                columns.append(f"{EMBEDS[name]}(*)")
+        return ", ".join(columns)
+
+    def apply(self, query):
+        """
+        Adds embed modifiers (latest-N events) to a select query built from select_clause().
+        """
+        if "events" in self.include and self.events_limit is not None:
+            query = query.order("created_at", desc=True, foreign_table="shipment_events")\
+                .limit(self.events_limit, foreign_table="shipment_events")
+        return query
+
+    def trim_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Oldest-first, capped to the latest `events_limit`.
+        """
+        events = sorted(events, key=lambda e: e.get('created_at') or "")
+        if self.events_limit is not None:
+            events = events[-self.events_limit:] if self.events_limit > 0 else []
+        return events
+
+    def shape(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Renames embeds to their API names and drops everything not requested.
+        """
+        out = {f: row.get(f) for f in self.fields}
+        for name in self.include:
+            rows = row.get(EMBEDS[name]) or []
+            if name == "events":
+                rows = [{k: e.get(k) for k in self.event_fields} for e in rows]
+            out[name] = rows
+        return out
@@ -0,0 +1,207 @@
+import csv
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.core.config import settings
+
+DEFAULT_PINCODE_FILE = Path(__file__).resolve().parent.parent / "data" / "pincode_centroids.csv"
+
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Tuple[float, float]
+
+
+@lru_cache(maxsize=4)
+def load_pincode_centroids(path: str) -> Dict[str, Point]:
+    """
+    Reads `pincode,lat,lon` rows. Cached per path so the file is parsed once per process.
+    """
+    centroids = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            centroids[row["pincode"].strip()] = (float(row["lat"]), float(row["lon"]))
+    return centroids
+
+
+@lru_cache(maxsize=4)
+def _district_centroids(path: str) -> Dict[str, Point]:
+    """
+    Mean centroid per 3-digit pincode prefix (sorting district), used when a
+    pincode is missing from the data file.
+    """
+    sums: Dict[str, List[float]] = {}
+    for pincode, (lat, lon) in load_pincode_centroids(path).items():
+        acc = sums.setdefault(pincode[:3], [0.0, 0.0, 0])
+        acc[0] += lat
+        acc[1] += lon
+        acc[2] += 1
+    return {prefix: (lat / n, lon / n) for prefix, (lat, lon, n) in sums.items()}
+
+
+def preload_pincode_data() -> int:
+    """
+    Parses the pincode file (and district fallbacks) up front, e.g. before forking workers.
+    """
+    path = settings.PINCODE_DATA_PATH or str(DEFAULT_PINCODE_FILE)
+    _district_centroids(path)
+    return len(load_pincode_centroids(path))
+
+
+def locate_pincode(pincode: Optional[str]) -> Optional[Point]:
+    path = settings.PINCODE_DATA_PATH or str(DEFAULT_PINCODE_FILE)
+    pincode = (pincode or "").strip()
+    if not pincode:
+        return None
+    return load_pincode_centroids(path).get(pincode) or _district_centroids(path).get(pincode[:3])
+
+
+def haversine_km(a: Point, b: Point) -> float:
+    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class DistanceMatrixCache:
+    """
+    LRU of distance matrices keyed by the (sorted) pincode set of a run sheet.
+    Riders refresh the same run sheet many times a shift; only the first call pays
+    the O(n^2) haversine pass.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, ...], List[List[float]]]" = OrderedDict()
+
+    def get(self, pincodes: Tuple[str, ...], points: List[Point]) -> List[List[float]]:
+        with self._lock:
+            matrix = self._entries.get(pincodes)
+            if matrix is not None:
+                self._entries.move_to_end(pincodes)
+                return matrix
+
+        n = len(points)
+        matrix = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            row = matrix[i]
+            for j in range(i + 1, n):
+                d = haversine_km(points[i], points[j])
+                row[j] = d
+                matrix[j][i] = d
+
+        with self._lock:
+            self._entries[pincodes] = matrix
+            self._entries.move_to_end(pincodes)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return matrix
+
+
+distance_matrix_cache = DistanceMatrixCache(settings.ROUTE_MATRIX_CACHE_SIZE)
+
+
+def _nearest_neighbour(dist: List[List[float]]) -> List[int]:
+    """
+    Greedy tour from node 0 (the depot) over every other node.
+    """
+    n = len(dist)
+    route = [0]
+    remaining = set(range(1, n))
+    current = 0
+    while remaining:
+        row = dist[current]
+        current = min(remaining, key=row.__getitem__)
+        remaining.remove(current)
+        route.append(current)
+    return route
+
+
+def _two_opt(route: List[int], dist: List[List[float]], deadline: float) -> List[int]:
+    """
+    2-opt on an OPEN path that starts at the depot (route[0] is fixed, the end is free).
+    Reversing route[i..j] swaps edges (a,b),(c,d) for (a,c),(b,d); when j is the last
+    stop there is no (c,d) edge to replace.
+    """
+    n = len(route)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 1):
+            a = route[i - 1]
+            row_a = dist[a]
+            b = route[i]
+            d_ab = row_a[b]
+            for j in range(i + 1, n):
+                c = route[j]
+                if j == n - 1:
+                    delta = row_a[c] - d_ab
+                else:
+                    d = route[j + 1]
+                    delta = row_a[c] + dist[b][d] - d_ab - dist[c][d]
+                if delta < -1e-9:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    b = route[i]
+                    d_ab = row_a[b]
+                    improved = True
+    return route
+
+
+def plan_run_sheet(
+    stops: List[Dict[str, Any]],
+    start: Optional[Point] = None,
+    time_budget_ms: float = 500
+) -> Dict[str, Any]:
+    """
+    Orders delivery stops (dicts with a `pincode`) using nearest-neighbour + 2-opt.
+    Stops sharing a pincode collapse into one node, so the matrix is per pincode set.
+    Without a start point the depot is a virtual node at distance 0 from every stop,
+    which lets the heuristic pick the best first stop.
+    Stops whose pincode cannot be located are returned separately under `unlocated`.
+    """
+    started = time.perf_counter()
+
+    by_pincode: Dict[str, List[Dict[str, Any]]] = {}
+    unlocated = []
+    for stop in stops:
+        pincode = (stop.get("pincode") or "").strip()
+        if locate_pincode(pincode) is None:
+            unlocated.append(stop)
+        else:
+            by_pincode.setdefault(pincode, []).append(stop)
+
+    pincodes = tuple(sorted(by_pincode))
+    points = [locate_pincode(p) for p in pincodes]
+    matrix = distance_matrix_cache.get(pincodes, points)
+
+    # Node 0 is the depot; pincode k is node k + 1
+    start_row = [0.0] + [haversine_km(start, p) if start else 0.0 for p in points]
+    dist = [start_row] + [[start_row[k + 1]] + row for k, row in enumerate(matrix)]
+
+    route = _nearest_neighbour(dist)
+    route = _two_opt(route, dist, started + time_budget_ms / 1000)
+
+    ordered = []
+    total_km = 0.0
+    previous = 0
+    for node in route[1:]:
+        leg = dist[previous][node] if (previous or start) else 0.0
+        total_km += leg
+        for idx, stop in enumerate(by_pincode[pincodes[node - 1]]):
+            ordered.append({
+                **stop,
+                "sequence": len(ordered) + 1,
+                "distance_from_previous_km": round(leg if idx == 0 else 0.0, 2)
+            })
+        previous = node
+
+    return {
+        "stops": ordered,
+        "unlocated": unlocated,
+        "total_distance_km": round(total_km, 2),
+        "computed_in_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
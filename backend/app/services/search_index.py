@@ -0,0 +1,504 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+from supabase import Client
+
+from app.core.invalidation import invalidation_bus
+
+SEARCH_FIELDS = ("tracking_id", "contact_phone", "contact_name", "city")
+
+# Same default cut-off as pg_trgm's similarity_threshold
+DEFAULT_SIMILARITY = 0.3
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_NON_DIGIT = re.compile(r"[^0-9]+")
+# Tracking IDs ('DEL-…') and phone numbers: names and cities never look like this
+_IDENTIFIER = re.compile(r"^\s*del-|[0-9]", re.IGNORECASE)
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    return _NON_ALNUM.sub(" ", (value or "").lower()).strip()
+
+
+def _normalize_phone(value: Optional[str]) -> str:
+    return _NON_DIGIT.sub("", value or "")
+
+
+def _trigrams(text: str) -> Set[str]:
+    """
+    pg_trgm style trigrams: every word padded with two leading and one trailing space.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class _PrefixIndex:
+    """
+    Sorted key list + key -> doc ids. Prefix lookups are a bisect plus a short scan.
+    Bulk loads append unsorted and sort once on the next read (insort per key is O(n)).
+    """
+    def __init__(self):
+        self.keys: List[str] = []
+        self.postings: Dict[str, Set[str]] = {}
+        self._sorted = True
+
+    def _ensure_sorted(self):
+        if not self._sorted:
+            self.keys.sort()
+            self._sorted = True
+
+    def add(self, key: str, doc_id: str, bulk: bool = False):
+        ids = self.postings.get(key)
+        if ids is None:
+            ids = self.postings[key] = set()
+            if bulk or not self._sorted:
+                self.keys.append(key)
+                self._sorted = False
+            else:
+                bisect.insort(self.keys, key)
+        ids.add(doc_id)
+
+    def discard(self, key: str, doc_id: str):
+        ids = self.postings.get(key)
+        if ids is None:
+            return
+        ids.discard(doc_id)
+        if not ids:
+            del self.postings[key]
+            self._ensure_sorted()
+            pos = bisect.bisect_left(self.keys, key)
+            if pos < len(self.keys) and self.keys[pos] == key:
+                del self.keys[pos]
+
+    def exact(self, key: str) -> Set[str]:
+        return self.postings.get(key, set())
+
+    def prefix(self, prefix: str, limit: int) -> List[Tuple[str, str]]:
+        """
+        Returns up to `limit` (key, doc_id) pairs whose key starts with `prefix`.
+        """
+        self._ensure_sorted()
+        hits = []
+        pos = bisect.bisect_left(self.keys, prefix)
+        while pos < len(self.keys) and len(hits) < limit:
+            key = self.keys[pos]
+            if not key.startswith(prefix):
+                break
+            for doc_id in self.postings[key]:
+                hits.append((key, doc_id))
+                if len(hits) >= limit:
+                    break
+            pos += 1
+        return hits
+
+
+class _TrigramIndex:
+    """
+    Fuzzy index for names and cities.
+    Values are interned as DISTINCT terms (term -> doc ids) and trigrams are built over
+    the distinct WORDS of those terms, a vocabulary that stays small even at millions of
+    shipments. A query matches a term when every query word fuzzy-matches one of its words.
+    """
+    # Closest vocabulary words considered per query word
+    WORD_CANDIDATES = 5
+    # Longer queries are truncated; names/cities rarely need more words
+    MAX_QUERY_WORDS = 4
+    # Upper bound on candidate terms checked per query (latency cap for common words)
+    MAX_SCANNED_TERMS = 2000
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}  # term -> doc ids
+        self.words: Dict[str, Set[str]] = {}     # word -> terms
+        # Words are numbered so trigram postings hold small ints (cheaper to count
+        # and hash than strings); ids of removed words are reused
+        self.word_ids: Dict[str, int] = {}
+        self.vocab: List[Optional[str]] = []     # word id -> word
+        self.gram_counts: List[int] = []         # word id -> number of trigrams
+        self.grams: Dict[str, Set[int]] = {}     # trigram -> word ids
+        self._free_ids: List[int] = []
+
+    def add(self, term: str, doc_id: str):
+        if not term:
+            return
+        ids = self.postings.get(term)
+        if ids is None:
+            ids = self.postings[term] = set()
+            for word in set(term.split()):
+                terms = self.words.get(word)
+                if terms is None:
+                    terms = self.words[word] = set()
+                    self._add_word(word)
+                terms.add(term)
+        ids.add(doc_id)
+
+    def _add_word(self, word: str):
+        grams = _trigrams(word)
+        if self._free_ids:
+            word_id = self._free_ids.pop()
+            self.vocab[word_id] = word
+            self.gram_counts[word_id] = len(grams)
+        else:
+            word_id = len(self.vocab)
+            self.vocab.append(word)
+            self.gram_counts.append(len(grams))
+        self.word_ids[word] = word_id
+        for g in grams:
+            self.grams.setdefault(g, set()).add(word_id)
+
+    def discard(self, term: str, doc_id: str):
+        ids = self.postings.get(term)
+        if ids is None:
+            return
+        ids.discard(doc_id)
+        if ids:
+            return
+        del self.postings[term]
+        for word in set(term.split()):
+            terms = self.words.get(word)
+            if terms is None:
+                continue
+            terms.discard(term)
+            if terms:
+                continue
+            del self.words[word]
+            word_id = self.word_ids.pop(word)
+            self.vocab[word_id] = None
+            self._free_ids.append(word_id)
+            for g in _trigrams(word):
+                word_ids = self.grams.get(g)
+                if word_ids is not None:
+                    word_ids.discard(word_id)
+                    if not word_ids:
+                        del self.grams[g]
+
+    def _match_word(self, word: str, threshold: float) -> List[Tuple[str, float]]:
+        """
+        Vocabulary words similar to `word`, best-first.
+        Shared-trigram counts come from one Counter pass over the query trigrams'
+        postings (counted in C); a word with Jaccard similarity >= t shares at least
+        m = ceil(t * |Q|) trigrams with the query, so only those are scored.
+        """
+        q_grams = _trigrams(word)
+        size = len(q_grams)
+        needed = max(1, math.ceil(threshold * size))
+        shared_counts: Counter = Counter()
+        for g in q_grams:
+            shared_counts.update(self.grams.get(g, ()))
+
+        gram_counts = self.gram_counts
+        scored = [
+            (word_id, score) for word_id, shared in shared_counts.items()
+            if shared >= needed and (score := shared / (size + gram_counts[word_id] - shared)) >= threshold
+        ]
+        if not scored:
+            return []
+        # Words tied with the last candidate are all kept so ties break by word
+        cutoff = heapq.nlargest(self.WORD_CANDIDATES, (score for _, score in scored))[-1]
+        found = sorted(
+            ((self.vocab[word_id], score) for word_id, score in scored if score >= cutoff),
+            key=lambda x: (-x[1], x[0])
+        )
+        return found[:self.WORD_CANDIDATES]
+
+    def search(self, query: str, threshold: float, limit: int) -> List[Tuple[str, float]]:
+        """
+        Returns (term, score) pairs best-first, at most enough to cover `limit` docs.
+        A term's score is the mean over query words of that word's best match among
+        the term's words.
+
+        One word: every term of a matched word has that word's score, so matched
+        words are walked best-first and the walk stops once `limit` docs are covered.
+        Several words: candidate terms are intersected smallest-first as C-level set
+        operations, and only the intersection, capped at MAX_SCANNED_TERMS, is
+        scored in Python.
+        Common words ("kumar") are therefore never walked in full.
+        Only the first MAX_QUERY_WORDS words are used.
+        """
+        matches = []
+        for word in query.split()[:self.MAX_QUERY_WORDS]:
+            found = self._match_word(word, threshold)
+            if not found:
+                return []
+            matches.append(found)
+        if not matches:
+            return []
+
+        results: List[Tuple[str, float]] = []
+        if len(matches) == 1:
+            seen: Set[str] = set()
+            covered = 0
+            for word, score in matches[0]:
+                for term in self.words[word]:
+                    if term in seen:
+                        continue
+                    seen.add(term)
+                    results.append((term, score))
+                    covered += len(self.postings[term])
+                    if covered >= limit:
+                        return sorted(results, key=lambda r: (-r[1], r[0]))
+            return sorted(results, key=lambda r: (-r[1], r[0]))
+
+        # Start from the query word with the fewest candidate terms; every other word
+        # narrows them with per-match intersections (each walks the smaller set)
+        ordered = sorted(matches, key=lambda found: sum(len(self.words[w]) for w, _ in found))
+        terms = set().union(*(self.words[w] for w, _ in ordered[0]))
+        for found in ordered[1:]:
+            terms = set().union(*(terms & self.words[w] for w, _ in found))
+            if not terms:
+                return []
+
+        for n, term in enumerate(terms):
+            if n >= self.MAX_SCANNED_TERMS:
+                break
+            words = set(term.split())
+            total = sum(max(score for w, score in found if w in words) for found in matches)
+            results.append((term, total / len(matches)))
+        results.sort(key=lambda r: (-r[1], r[0]))
+
+        covered = 0
+        for n, (term, _) in enumerate(results):
+            covered += len(self.postings[term])
+            if covered >= limit:
+                return results[:n + 1]
+        return results
+
+
+class ShipmentSearchIndex:
+    """
+    In-process admin search index.
+    - tracking_id: prefix
+    - contact_phone: exact + prefix (digits only)
+    - contact_name / city: trigram fuzzy match (from shipment_addresses)
+    Built in keyset pages (once, in the prefork master when there is one) and kept
+    current by ShipmentService write paths. A copy forked from an older snapshot
+    calls catch_up() to re-read only the shipments changed since.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._tracking = _PrefixIndex()
+        self._phones = _PrefixIndex()
+        self._names = _TrigramIndex()
+        self._cities = _TrigramIndex()
+        self.ready = False
+        # Epoch seconds at which the last build/catch-up started reading
+        self.snapshot_at: Optional[float] = None
+        # Ids written live while a build/catch-up is reading: its (older) rows must
+        # not overwrite them
+        self._live_ids: Optional[Set[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # --- Write side ---
+
+    def upsert(
+        self,
+        shipment: Dict[str, Any],
+        addresses: Optional[List[Dict[str, Any]]] = None,
+        bulk: bool = False
+    ):
+        """
+        Index (or re-index) a shipment row. Addresses default to the embedded
+        `shipment_addresses` list when the row was selected with it.
+        """
+        if addresses is None:
+            addresses = shipment.get("shipment_addresses") or []
+        doc = {
+            "tracking_id": (shipment.get("tracking_id") or "").upper(),
+            "status": shipment.get("status"),
+            "phones": {_normalize_phone(a.get("contact_phone")) for a in addresses} - {""},
+            "names": {_normalize_text(a.get("contact_name")) for a in addresses} - {""},
+            "cities": {_normalize_text(a.get("city")) for a in addresses} - {""},
+        }
+        doc_id = shipment["id"]
+        with self._lock:
+            if not bulk and self._live_ids is not None:
+                self._live_ids.add(doc_id)
+            self._unindex(doc_id)
+            self._docs[doc_id] = doc
+            if doc["tracking_id"]:
+                self._tracking.add(doc["tracking_id"], doc_id, bulk)
+            for phone in doc["phones"]:
+                self._phones.add(phone, doc_id, bulk)
+            for name in doc["names"]:
+                self._names.add(name, doc_id)
+            for city in doc["cities"]:
+                self._cities.add(city, doc_id)
+
+    def update_status(self, shipment_id: str, status: str):
+        with self._lock:
+            if self._live_ids is not None:
+                self._live_ids.add(shipment_id)
+            doc = self._docs.get(shipment_id)
+            if doc is not None:
+                doc["status"] = status
+
+    def remove(self, shipment_id: str):
+        with self._lock:
+            self._unindex(shipment_id)
+
+    def _unindex(self, doc_id: str):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        if doc["tracking_id"]:
+            self._tracking.discard(doc["tracking_id"], doc_id)
+        for phone in doc["phones"]:
+            self._phones.discard(phone, doc_id)
+        for name in doc["names"]:
+            self._names.discard(name, doc_id)
+        for city in doc["cities"]:
+            self._cities.discard(city, doc_id)
+
+    def build(self, supabase: Client, page_size: int = 1000) -> int:
+        """
+        Loads every shipment (+ addresses) using keyset pagination on id,
+        so no single response holds the whole table.
+        """
+        started = time.time()
+        loaded = self._load(supabase, page_size)
+        self.snapshot_at = started
+        self.ready = True
+        return loaded
+
+    def catch_up(self, supabase: Client, page_size: int = 1000, skew_seconds: int = 60) -> int:
+        """
+        Re-reads only the shipments updated since the snapshot was taken (less
+        `skew_seconds`, for transactions that committed after it with an earlier
+        updated_at). Falls back to a full build without a snapshot.
+        """
+        if self.snapshot_at is None:
+            return self.build(supabase, page_size)
+        started = time.time()
+        since = datetime.fromtimestamp(self.snapshot_at - skew_seconds, timezone.utc).isoformat()
+        loaded = self._load(supabase, page_size, since)
+        self.snapshot_at = started
+        return loaded
+
+    def _load(self, supabase: Client, page_size: int, updated_since: Optional[str] = None) -> int:
+        with self._lock:
+            self._live_ids = set()
+        last_id = None
+        loaded = 0
+        try:
+            while True:
+                query = supabase.table("shipments")\
+                    .select("id, tracking_id, status, shipment_addresses(contact_name, contact_phone, city)")
+                if updated_since is not None:
+                    query = query.gt("updated_at", updated_since)
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                res = query.order("id").limit(page_size).execute()
+                rows = res.data or []
+                with self._lock:
+                    for row in rows:
+                        if row["id"] not in self._live_ids:
+                            self.upsert(row, bulk=True)
+                loaded += len(rows)
+                if len(rows) < page_size:
+                    break
+                last_id = rows[-1]["id"]
+        finally:
+            with self._lock:
+                self._live_ids = None
+                self._tracking._ensure_sorted()
+                self._phones._ensure_sorted()
+        return loaded
+
+    # --- Read side ---
+
+    def search(
+        self,
+        q: str,
+        field: Optional[str] = None,
+        limit: int = 20,
+        threshold: float = DEFAULT_SIMILARITY
+    ) -> List[Dict[str, Any]]:
+        """
+        Searches one field (or all of them) and returns best-first hits:
+        {id, tracking_id, status, matched_field, matched_value, score}
+        Without a field, a query that looks like a tracking ID or phone number
+        only searches those two.
+        """
+        fields = (field,) if field else SEARCH_FIELDS
+        hits: Dict[str, Dict[str, Any]] = {}
+
+        def collect(doc_id: str, matched_field: str, value: str, score: float):
+            current = hits.get(doc_id)
+            if current is None or score > current["score"]:
+                hits[doc_id] = {"matched_field": matched_field, "matched_value": value, "score": round(score, 3)}
+
+        with self._lock:
+            if "tracking_id" in fields:
+                prefix = q.strip().upper()
+                if prefix:
+                    for key, doc_id in self._tracking.prefix(prefix, limit):
+                        collect(doc_id, "tracking_id", key, 1.0 if key == prefix else 0.9)
+
+            if "contact_phone" in fields:
+                phone = _normalize_phone(q)
+                if phone:
+                    for doc_id in list(self._phones.exact(phone))[:limit]:
+                        collect(doc_id, "contact_phone", phone, 1.0)
+                    for key, doc_id in self._phones.prefix(phone, limit):
+                        collect(doc_id, "contact_phone", key, 1.0 if key == phone else 0.8)
+
+            # Unfielded identifier-looking queries skip the (costlier) fuzzy fields
+            text = _normalize_text(q) if field or not _IDENTIFIER.search(q) else ""
+            for name, trigram_index in (("contact_name", self._names), ("city", self._cities)):
+                if name not in fields or not text:
+                    continue
+                taken = 0
+                for term, score in trigram_index.search(text, threshold, limit):
+                    for doc_id in trigram_index.postings.get(term, ()):
+                        collect(doc_id, name, term, score)
+                        taken += 1
+                        if taken >= limit:
+                            break
+                    if taken >= limit:
+                        break
+
+            ranked = sorted(hits.items(), key=lambda kv: (-kv[1]["score"], kv[0]))[:limit]
+            results = []
+            for doc_id, hit in ranked:
+                doc = self._docs.get(doc_id)
+                if doc is None:
+                    continue
+                results.append({
+                    "id": doc_id,
+                    "tracking_id": doc["tracking_id"],
+                    "status": doc["status"],
+                    **hit
+                })
+        return results
+
+
+# Process-wide index shared by the service layer and the admin endpoint
+shipment_search_index = ShipmentSearchIndex()
+
+
+def _on_shipment_changed(key: str, data: Optional[Dict[str, Any]], change: Tuple[int, int]):
+    """
+    Applies shipment writes made by any worker (including this one) to the local index.
+    """
+    if not data:
+        return
+    if "search" in data:
+        shipment_search_index.upsert(data["search"]["shipment"], data["search"]["addresses"])
+    elif "status" in data:
+        shipment_search_index.update_status(key.split(":", 1)[1], data["status"])
+
+
+invalidation_bus.subscribe("shipment:", _on_shipment_changed)
@@ -1,88 +1,140 @@
 from supabase import Client
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus, VersionedCache, shipment_key, tracking_key, user_shipments_key
+from app.core.singleflight import SingleFlight
+from app.services.search_index import shipment_search_index
+from app.services.dispatch import LeastLoadedDispatcher
+from app.services.event_archive import event_archive
+from app.services.projection import ShipmentProjection, EVENT_FIELDS
+from app.services.cursor import after_filter, cursor_of, encode_cursor, is_after
+from app.services.batching import chunks, pages_by_id, IN_FILTER_CHUNK, BULK_INSERT_CHUNK, PAGE_SIZE
+
+ASSIGNMENT_PREFIX = "ASSIGNED_TO_PARTNER:"
+
+# Public tracking responses, dropped on any write to the shipment (in any worker)
+tracking_cache = VersionedCache(
+    "tracking", invalidation_bus, settings.TRACKING_CACHE_MAX_ENTRIES, settings.TRACKING_CACHE_TTL_SECONDS
+)
+
+# Per-user status counts for the customer dashboard. Status writes (in any worker)
+# drop the entry and the next read refills it from the database; other writes
+# just keep it.
+status_counts_cache = VersionedCache(
+    "status_counts", invalidation_bus, settings.STATUS_COUNTS_CACHE_MAX_USERS, settings.STATUS_COUNTS_CACHE_TTL_SECONDS
+)
+
+def _on_user_shipments_changed(key: str, data: Optional[Dict[str, Any]], change: Tuple[int, int]):
+    # No in-place deltas for status writes: an entry filled after the write committed
+    # but before its message got here already counts it. The version bump drops it.
+    if "status" not in (data or {}):
+        # Not a status change: counts still hold
+        status_counts_cache.update(key, lambda counts: counts, change)
+
+invalidation_bus.subscribe("user-shipments:", _on_user_shipments_changed)
+
+# Concurrent identical reads share one fetch. Keys include the bus version, so a
+# request arriving after a write never joins a fetch that started before it.
+tracking_flight = SingleFlight("tracking")
+admin_detail_flight = SingleFlight("admin_detail")
 
 class ShipmentService:
     def __init__(self, supabase: Client):
         self.supabase = supabase
 
+    @staticmethod
+    def _publish_change(shipment: Dict[str, Any], data: Optional[Dict[str, Any]] = None):
+        """
+        Invalidates every cached view of a shipment row (needs id; tracking_id/user_id if known).
+        """
+        invalidation_bus.publish(
+            shipment_key(shipment['id']),
+            tracking_key(shipment['tracking_id']) if shipment.get('tracking_id') else None,
+            user_shipments_key(shipment['user_id']) if shipment.get('user_id') else None,
+            data=data
+        )
+
     def get_public_tracking(self, tracking_id: str) -> Optional[Dict[str, Any]]:
         """
         Fetches shipment data for public tracking page.
+        Served from the tracking cache, else one shared fetch per tracking ID.
+        """
+        cached = tracking_cache.get(tracking_key(tracking_id))
+        if cached is not None:
+            return cached
+        flight_key = (tracking_id, invalidation_bus.version(tracking_key(tracking_id)))
+        return tracking_flight.do(flight_key, lambda: self._load_public_tracking(tracking_id))
+
+    async def get_public_tracking_async(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Same as get_public_tracking for async callers: requests waiting on an
+        in-flight fetch don't hold a threadpool thread.
+        """
+        cached = tracking_cache.get(tracking_key(tracking_id))
+        if cached is not None:
+            return cached
+        flight_key = (tracking_id, invalidation_bus.version(tracking_key(tracking_id)))
+        return await tracking_flight.do_async(flight_key, lambda: self._load_public_tracking(tracking_id))
+
+    def _load_public_tracking(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        """
         Sanitized via Select query.
         """
-        # 1. Fetch Shipment Basic Info
+        cache_key = tracking_key(tracking_id)
+        version = tracking_cache.begin(cache_key)
+
+        # id is needed for the events read only; it is not returned
         response = self.supabase.table("shipments")\
-            .select("tracking_id, status, created_at")\
+            .select("id, tracking_id, status, events_archive_ref")\
             .eq("tracking_id", tracking_id)\
+            .limit(1)\
             .execute()
-            
         if not response.data:
             return None
-        
         shipment = response.data[0]
-        
-        # 2. Fetch Events (Sorted Oldest -> Newest)
-        # Note: We query events by tracking_id indirectly via shipment join, 
-        # but since RLS prevents public read, we must use a SERVICE ROLE if we were truly server-side 
-        # OR rely on `shipments` table having a public RLS policy?
-        # WAIT: The requirements said "Public tracking is READ-ONLY" and "Public endpoint MUST work without authentication".
-        # This implies either:
-        # A) We use a Service Role Key (Admin) here to bypass RLS for this specific query
-        # B) We adjust RLS to allow public read on `tracking_id` queries.
-        # Given "Do NOT write SQL", we must assume we are using the Client passed in.
-        # If the client is ANON key, it respects RLS. 
-        # Currently RLS blocks public read.
-        # CORRECTION Rule #6: "Access control MUST be enforced in backend services". 
-        # This implies the Backend (FastAPI) is the trusted party.
-        # PROPOSAL: We should probably use the SERVICE_ROLE_KEY for this specific public readout 
-        # or assume the `supabase` client passed here has necessary privileges.
-        # Since `deps.get_supabase()` typically uses public Anon key, this will Fail RLS.
-        # I will implement logic assuming we might need to elevate privileges conceptually,
-        # but strictly following the prompt "Do NOT write SQL", I cannot change RLS.
-        # I will assume the provided 'supabase' client has access OR the user wants me 
-        # to accept that it *might* fail RLS until they fix it, 
-        # BUT Rule 6 says "Access control MUST be enforced in backend".
-        # This implies I should treat the Backend as an Admin regarding Database Access 
-        # and sanitize the Output in Python.
-        
-        # NOTE: For now, I will write the query. If it fails due to RLS, that is a config issue.
-        # Code-wise:
-        
-        shipment_id = response.data[0]['id'] # Need ID for events join? No, `shipments` already returned. Wait. 
-        # `select("tracking_id...")` didn't return ID. Let's ask for ID too? 
-        # NO, "Must NOT leak internal IDs". But I need it for the *internal* join query.
-        # OK, I will select ID but strip it before returning.
-        
-        # Re-query with ID
-        response = self.supabase.table("shipments")\
-            .select("id, tracking_id, status, created_at")\
-            .eq("tracking_id", tracking_id)\
-            .execute()
-        shipment = response.data[0]
-        
+
+        # Events, oldest -> newest
         events_response = self.supabase.table("shipment_events")\
-            .select("status, description, location, created_at")\
+            .select("id, status, description, location, created_at")\
             .eq("shipment_id", shipment['id'])\
             .order("created_at", desc=False)\
             .execute()
+
+        # Closed shipments may have (part of) their history in the cold archive
+        events = event_archive.merge_events(
+            shipment.get('events_archive_ref'), shipment['id'], events_response.data,
+            fields=["id", "status", "description", "location", "created_at"]
+        )
             
-        return {
+        result = {
             "tracking_id": shipment['tracking_id'],
             "status": shipment['status'],
-            "events": events_response.data
+            # Strip internal event IDs
+            "events": [{k: v for k, v in e.items() if k != 'id'} for e in events]
         }
+        tracking_cache.put(cache_key, result, version)
+        return result
 
-    def get_private_shipment_data(self, shipment_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    def get_private_shipment_data(
+        self,
+        shipment_id: str,
+        user_id: str,
+        projection: Optional[ShipmentProjection] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        Fetches full shipment details for the owner.
+        Fetches shipment details for the owner, limited to the projection
+        (default: all columns + addresses + events).
         """
+        projection = projection or ShipmentProjection()
+
         # RLS 'Customers can view own shipments' handles the security check naturally 
         # if we pass the user's JWT. But here in FastAPI logic:
         
-        response = self.supabase.table("shipments")\
-            .select("*, shipment_addresses(*), shipment_events(*)")\
-            .eq("id", shipment_id)\
-            .execute()
+        query = self.supabase.table("shipments")\
+            .select(projection.select_clause())\
+            .eq("id", shipment_id)
+        response = projection.apply(query).execute()
             
         if not response.data:
             return None
@@ -92,8 +144,132 @@ class ShipmentService:
         if shipment['user_id'] != user_id:
             # This should technically be caught by RLS (returning empty), but double check.
             return None
-            
-        return shipment
+
+        if "events" in projection.include:
+            shipment['shipment_events'] = projection.trim_events(event_archive.merge_events(
+                shipment.get('events_archive_ref'), shipment['id'], shipment.get('shipment_events', []),
+                fields=projection.event_columns
+            ))
+        return projection.shape(shipment)
+
+    def get_shipment_events_since(
+        self,
+        shipment_id: str,
+        user_id: str,
+        projection: ShipmentProjection,
+        since: Optional[Tuple[str, str]] = None
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Owner's event timeline (oldest first) and the cursor to pass as `since` next time.
+        With `since`: only events after that (created_at, id), `events_limit` of them at most.
+        Without: the whole timeline, or the latest `events_limit` events.
+        Ownership is a primary-key lookup; no shipment embeds are loaded.
+        Returns None if the shipment doesn't exist or isn't the user's.
+        """
+        owner = self.supabase.table("shipments")\
+            .select("id, user_id, events_archive_ref")\
+            .eq("id", shipment_id)\
+            .execute()
+        if not owner.data or owner.data[0]['user_id'] != user_id:
+            return None
+        archive_ref = owner.data[0].get('events_archive_ref')
+
+        limit = projection.events_limit
+        latest_first = since is None and limit is not None
+        query = self.supabase.table("shipment_events")\
+            .select(", ".join(projection.event_columns))\
+            .eq("shipment_id", shipment_id)
+        if since is not None:
+            query = query.or_(after_filter(since))
+        query = query.order("created_at", desc=latest_first).order("id", desc=latest_first)
+        if limit is not None:
+            query = query.limit(limit)
+        events = query.execute().data
+
+        if archive_ref:
+            # Normally all older than any hot event, but a client may hold a cursor from before archiving
+            archived = [
+                e for e in event_archive.read_events(archive_ref, shipment_id)
+                if since is None or is_after(e, since)
+            ]
+            seen = {e['id'] for e in events}
+            events = events + [{k: e.get(k) for k in projection.event_columns} for e in archived if e['id'] not in seen]
+
+        events.sort(key=lambda e: (e.get('created_at') or "", e.get('id') or ""))
+        if limit is not None:
+            events = (events[-limit:] if latest_first else events[:limit]) if limit > 0 else []
+
+        next_cursor = cursor_of(events[-1]) if events else (encode_cursor(*since) if since else None)
+        return [{k: e.get(k) for k in projection.event_fields} for e in events], next_cursor
+
+    def get_owner_shipments(
+        self,
+        user_id: str,
+        cursor: Optional[Tuple[str, str]] = None,
+        limit: int = 20,
+        status: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Owner's shipments, newest first, one keyset page at a time.
+        Each row is a summary: status, tracking ID, latest event, destination city.
+        status_counts/total cover all of the owner's shipments.
+        """
+        query = self.supabase.table("shipments")\
+            .select(
+                "id, tracking_id, status, created_at, events_archive_ref, "
+                "shipment_addresses(type, city), "
+                f"shipment_events({', '.join(EVENT_FIELDS)})"
+            )\
+            .eq("user_id", user_id)\
+            .eq("shipment_addresses.type", "DELIVERY")\
+            .order("created_at", desc=True, foreign_table="shipment_events")\
+            .limit(1, foreign_table="shipment_events")
+        if status:
+            query = query.eq("status", status)
+        if cursor is not None:
+            query = query.or_(after_filter(cursor, descending=True))
+        # One extra row tells us whether there is a next page
+        rows = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute().data
+
+        page = rows[:limit]
+        summaries = []
+        for s in page:
+            events = s.get('shipment_events') or []
+            latest = events[0] if events else None
+            if latest is None and s.get('events_archive_ref'):
+                archived = event_archive.read_events(s['events_archive_ref'], s['id'])
+                latest = {k: archived[-1].get(k) for k in EVENT_FIELDS} if archived else None
+            addresses = s.get('shipment_addresses') or []
+            summaries.append({
+                "id": s['id'],
+                "tracking_id": s['tracking_id'],
+                "status": s['status'],
+                "created_at": s['created_at'],
+                "destination_city": addresses[0].get('city') if addresses else None,
+                "latest_event": latest
+            })
+
+        counts = self.get_status_counts(user_id)
+        return {
+            "data": summaries,
+            "next_cursor": cursor_of(page[-1]) if len(rows) > limit else None,
+            "status_counts": counts,
+            "total": sum(counts.values())
+        }
+
+    def get_status_counts(self, user_id: str) -> Dict[str, int]:
+        """
+        {status: count} over all of the owner's shipments, from the per-user cache.
+        """
+        cache_key = user_shipments_key(user_id)
+        cached = status_counts_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        version = status_counts_cache.begin(cache_key)
+        res = self.supabase.rpc("shipment_status_counts", {"p_user_id": user_id}).execute()
+        counts = {r['status']: r['count'] for r in res.data or [] if r['count']}
+        status_counts_cache.put(cache_key, counts, version)
+        return counts
 
     def create_shipment(self, user_id: str, shipment_data) -> Dict[str, Any]:
         """
@@ -138,7 +314,14 @@ class ShipmentService:
                 res_items = self.supabase.table("shipment_items").insert(items_payload).execute()
                 if not res_items.data:
                     raise Exception("Failed to insert items")
-                    
+
+            # Invalidate caches and feed every worker's admin search index
+            self._publish_change(res_ship.data[0], data={"status": "PENDING", "search": {
+                "shipment": {k: res_ship.data[0].get(k) for k in ("id", "tracking_id", "status")},
+                "addresses": [
+                    {k: a.get(k) for k in ("contact_name", "contact_phone", "city")} for a in res_addr.data
+                ]
+            }})
             return res_ship.data[0]
 
         except Exception as e:
@@ -154,7 +337,7 @@ class ShipmentService:
         """
         # 1. Verify Ownership & Status
         res = self.supabase.table("shipments")\
-            .select("id, status, user_id")\
+            .select("id, status, user_id, tracking_id")\
             .eq("id", shipment_id)\
             .execute()
             
@@ -200,6 +383,7 @@ class ShipmentService:
         }
         
         self.supabase.table("shipment_events").insert(event_payload).execute()
+        self._publish_change(shipment)
         return True
 
     def assign_partner(self, admin_id: str, shipment_id: str, partner_id: str) -> bool:
@@ -217,7 +401,7 @@ class ShipmentService:
         description = f"ASSIGNED_TO_PARTNER:{partner_id}"
         
         # Get current status to keep consistency
-        shipment = self.supabase.table("shipments").select("status").eq("id", shipment_id).single().execute()
+        shipment = self.supabase.table("shipments").select("id, status, tracking_id, user_id").eq("id", shipment_id).single().execute()
         current_status = shipment.data['status']
         
         event_payload = {
@@ -227,6 +411,7 @@ class ShipmentService:
         }
         
         self.supabase.table("shipment_events").insert(event_payload).execute()
+        self._publish_change(shipment.data)
         return True
 
     def scan_shipment(self, partner_id: str, shipment_id: str, scan_data) -> bool:
@@ -259,7 +444,7 @@ class ShipmentService:
             raise ValueError(f"Access Denied: Shipment not assigned to you.")
 
         # 3. Fetch Current Status
-        shipment_res = self.supabase.table("shipments").select("status").eq("id", shipment_id).single().execute()
+        shipment_res = self.supabase.table("shipments").select("id, status, tracking_id, user_id").eq("id", shipment_id).single().execute()
         current_status = shipment_res.data['status']
         new_status = scan_data.status
         
@@ -294,6 +479,7 @@ class ShipmentService:
                 "location": scan_data.location
             }
             self.supabase.table("shipment_events").insert(event_payload).execute()
+            self._publish_change(shipment_res.data, data={"status": new_status})
             
         except Exception as e:
             # Rollback: Revert status if event failed
@@ -323,6 +509,7 @@ class ShipmentService:
                 "description": f"FORCE_UPDATE: {force_data.reason}"
             }
             self.supabase.table("shipment_events").insert(event_payload).execute()
+            self._publish_change(res_upd.data[0], data={"status": force_data.status})
             
         except Exception as e:
             # If update succeeded but event failed, we roll back status?
@@ -334,6 +521,180 @@ class ShipmentService:
             
         return True
 
+    def get_partner_run_sheet_stops(self, partner_id: str) -> List[Dict[str, Any]]:
+        """
+        PARTNER: OUT_FOR_DELIVERY shipments currently assigned to this partner,
+        flattened with their DELIVERY address for route planning.
+        """
+        # 1. Shipments out for delivery that were ever assigned to this partner. The
+        # join keeps the result to current work, not the partner's whole history.
+        assigned = pages_by_id(lambda: self.supabase.table("shipment_events")
+            .select("id, shipment_id, shipments!inner(status)")
+            .eq("description", f"{ASSIGNMENT_PREFIX}{partner_id}")
+            .eq("shipments.status", "OUT_FOR_DELIVERY"))
+        candidate_ids = list({evt['shipment_id'] for evt in assigned})
+        if not candidate_ids:
+            return []
+
+        # 2. Keep those out for delivery
+        out_for_delivery = []
+        for chunk in chunks(candidate_ids, IN_FILTER_CHUNK):
+            res = self.supabase.table("shipments")\
+                .select("id, tracking_id, status, shipment_addresses(type, contact_name, contact_phone, address_line_1, address_line_2, city, pincode)")\
+                .in_("id", chunk)\
+                .eq("status", "OUT_FOR_DELIVERY")\
+                .execute()
+            out_for_delivery.extend(res.data)
+        if not out_for_delivery:
+            return []
+
+        # 3. Drop shipments since re-assigned to someone else (latest assignment wins)
+        latest_partner = self._latest_assignments([s['id'] for s in out_for_delivery])
+
+        stops = []
+        for s in out_for_delivery:
+            if latest_partner.get(s['id']) != partner_id:
+                continue
+            delivery = next((a for a in s.get("shipment_addresses", []) if a.get("type") == "DELIVERY"), {})
+            stops.append({
+                "shipment_id": s['id'],
+                "tracking_id": s['tracking_id'],
+                "contact_name": delivery.get("contact_name"),
+                "contact_phone": delivery.get("contact_phone"),
+                "address_line_1": delivery.get("address_line_1"),
+                "address_line_2": delivery.get("address_line_2"),
+                "city": delivery.get("city"),
+                "pincode": delivery.get("pincode"),
+            })
+        return stops
+
+    def _latest_assignments(self, shipment_ids: List[str]) -> Dict[str, str]:
+        """
+        shipment_id -> partner_id of the most recent ASSIGNED_TO_PARTNER event.
+        """
+        latest: Dict[str, Tuple[str, str]] = {}  # shipment_id -> (created_at, partner_id)
+        for chunk in chunks(shipment_ids, IN_FILTER_CHUNK):
+            events = pages_by_id(lambda: self.supabase.table("shipment_events")
+                .select("id, shipment_id, description, created_at")
+                .in_("shipment_id", chunk)
+                .like("description", f"{ASSIGNMENT_PREFIX}%"))
+            for evt in events:
+                current = latest.get(evt['shipment_id'])
+                if current is None or evt['created_at'] > current[0]:
+                    latest[evt['shipment_id']] = (evt['created_at'], evt['description'].split(":")[1].strip())
+        return {shipment_id: partner_id for shipment_id, (_, partner_id) in latest.items()}
+
+    def _partner_open_loads(self, partner_ids: List[str]) -> Dict[str, int]:
+        """
+        Count of open (not closed) shipments whose latest assignment is each partner.
+        Aggregated in the database (partner_open_loads), so the cost follows open
+        work rather than every assignment a partner ever had.
+        """
+        loads = {pid: 0 for pid in partner_ids}
+        for chunk in chunks(partner_ids, IN_FILTER_CHUNK):
+            res = self.supabase.rpc("partner_open_loads", {"p_partner_ids": chunk}).execute()
+            for row in res.data:
+                if row['partner_id'] in loads:
+                    loads[row['partner_id']] = row['open_count']
+        return loads
+
+    def auto_dispatch(self, admin_id: str, dispatch_data) -> Dict[str, Any]:
+        """
+        ADMIN ONLY: Assigns unassigned PENDING shipments in a pincode region across
+        eligible partners (least-loaded first, capacity and zone respected).
+        Writes all ASSIGNED_TO_PARTNER events in bulk unless dry_run.
+        """
+        region = dispatch_data.pincode_prefix
+
+        # 1. Eligible partners: active, serving a zone that overlaps the region
+        query = self.supabase.table("partner_profiles")\
+            .select("id, service_pincode_prefixes, capacity")\
+            .eq("is_active", True)
+        if dispatch_data.partner_ids:
+            query = query.in_("id", dispatch_data.partner_ids)
+        partners = []
+        for p in query.execute().data:
+            prefixes = [z for z in (p.get('service_pincode_prefixes') or []) if z.startswith(region) or region.startswith(z)]
+            if prefixes:
+                partners.append({**p, "service_pincode_prefixes": prefixes})
+
+        # 2. Current load
+        loads = self._partner_open_loads([p['id'] for p in partners])
+        for p in partners:
+            p['load'] = loads.get(p['id'], 0)
+
+        # 3. Unassigned shipments in the region (oldest first). PENDING rows that
+        # already carry an assignment are filtered after the fetch, so keep paging
+        # until `limit` unassigned ones are collected or the region is exhausted.
+        pending = []
+        cursor = None
+        page_size = min(PAGE_SIZE, dispatch_data.limit)
+        while len(pending) < dispatch_data.limit:
+            query = self.supabase.table("shipments")\
+                .select("id, tracking_id, status, created_at, shipment_addresses!inner(type, pincode)")\
+                .eq("status", "PENDING")\
+                .eq("shipment_addresses.type", dispatch_data.address_type.value)\
+                .like("shipment_addresses.pincode", f"{region}%")
+            if cursor:
+                query = query.or_(after_filter(cursor))
+            page = query\
+                .order("created_at", desc=False)\
+                .order("id", desc=False)\
+                .limit(page_size)\
+                .execute().data
+            already_assigned = self._latest_assignments([s['id'] for s in page])
+            pending.extend(s for s in page if s['id'] not in already_assigned)
+            if len(page) < page_size:
+                break
+            cursor = (page[-1]['created_at'], page[-1]['id'])
+        pending = pending[:dispatch_data.limit]
+
+        # 4. Plan
+        dispatcher = LeastLoadedDispatcher(partners)
+        assignments = []
+        unassigned = []
+        for s in pending:
+            pincode = (s['shipment_addresses'][0].get('pincode') or "").strip()
+            partner_id = dispatcher.pick(pincode)
+            if partner_id is None:
+                unassigned.append({"shipment_id": s['id'], "tracking_id": s['tracking_id'], "pincode": pincode})
+                continue
+            assignments.append({
+                "shipment_id": s['id'],
+                "tracking_id": s['tracking_id'],
+                "pincode": pincode,
+                "partner_id": partner_id,
+                "status": s['status']
+            })
+
+        # 5. Bulk write
+        if not dispatch_data.dry_run:
+            events = [
+                {
+                    "shipment_id": a['shipment_id'],
+                    "status": a['status'],
+                    "description": f"{ASSIGNMENT_PREFIX}{a['partner_id']}"
+                }
+                for a in assignments
+            ]
+            for chunk in chunks(events, BULK_INSERT_CHUNK):
+                self.supabase.table("shipment_events").insert(chunk).execute()
+            # One bus message per chunk rather than per shipment
+            for chunk in chunks(assignments, BULK_INSERT_CHUNK):
+                invalidation_bus.publish(*[
+                    key for a in chunk for key in (shipment_key(a['shipment_id']), tracking_key(a['tracking_id']))
+                ])
+
+        return {
+            "dry_run": dispatch_data.dry_run,
+            "pincode_prefix": region,
+            "assigned_count": len(assignments),
+            "unassigned_count": len(unassigned),
+            "assignments": assignments,
+            "unassigned": unassigned,
+            "load": dispatcher.load_report()
+        }
+
     def get_all_shipments(self, filters: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         ADMIN ONLY: List shipments with filters.
@@ -360,6 +721,10 @@ class ShipmentService:
         target_partner = filters.get("partner_id") if filters else None
         
         for s in shipments:
+            s['shipment_events'] = event_archive.merge_events(
+                s.get('events_archive_ref'), s['id'], s.get('shipment_events', [])
+            )
+
             # Derive Partner
             assigned_partner = None
             # Find latest assignment in events
@@ -383,34 +748,70 @@ class ShipmentService:
             
         return {"data": results, "count": len(results)}
 
-    def get_admin_shipment_detail(self, shipment_id: str) -> Optional[Dict[str, Any]]:
+    def search_shipments(self, q: str, field: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
         """
-        ADMIN ONLY: Full details + derived partner.
+        ADMIN ONLY: Search the in-process index by tracking ID prefix, phone,
+        contact name or city (fuzzy).
         """
-        res = self.supabase.table("shipments")\
-            .select("*, shipment_addresses(*), shipment_events(*), shipment_items(*)")\
-            .eq("id", shipment_id)\
-            .execute()
+        results = shipment_search_index.search(q, field=field, limit=limit)
+        return {
+            "data": results,
+            "count": len(results),
+            "index_ready": shipment_search_index.ready
+        }
+
+    def get_admin_shipment_detail(
+        self,
+        shipment_id: str,
+        projection: Optional[ShipmentProjection] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        ADMIN ONLY: Details + derived partner, limited to the projection
+        (default: everything, including items). Concurrent identical requests share one fetch.
+        """
+        projection = projection or ShipmentProjection(
+            default_include=("addresses", "events", "items"), extra_fields=("assigned_partner_id",)
+        )
+        flight_key = (shipment_id, projection.key(), invalidation_bus.version(shipment_key(shipment_id)))
+        return admin_detail_flight.do(flight_key, lambda: self._load_admin_shipment_detail(shipment_id, projection))
+
+    def _load_admin_shipment_detail(self, shipment_id: str, projection: ShipmentProjection) -> Optional[Dict[str, Any]]:
+        query = self.supabase.table("shipments")\
+            .select(projection.select_clause())\
+            .eq("id", shipment_id)
+        res = projection.apply(query).execute()
             
         if not res.data:
             return None
             
         s = res.data[0]
-        
-        # Derive Partner
-        assigned_partner = None
-        events = s.get("shipment_events", [])
-        events.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        for evt in events:
-            desc = evt.get("description", "") or ""
-            if desc.startswith("ASSIGNED_TO_PARTNER:"):
-                assigned_partner = desc.split(":")[1].strip()
-                break
-        
-        s['assigned_partner_id'] = assigned_partner
-        return s
-
+        full_history = "events" in projection.include and projection.events_limit is None
+        if "events" in projection.include:
+            s['shipment_events'] = projection.trim_events(event_archive.merge_events(
+                s.get('events_archive_ref'), s['id'], s.get('shipment_events', []),
+                fields=projection.event_columns
+            ))
 
+        if "assigned_partner_id" in projection.fields:
+            if full_history and "description" in projection.event_fields:
+                # Derive Partner from the events already loaded
+                assigned_partner = None
+                events = sorted(s.get("shipment_events", []), key=lambda x: x['created_at'], reverse=True)
 
+                for evt in events:
+                    desc = evt.get("description", "") or ""
+                    if desc.startswith("ASSIGNED_TO_PARTNER:"):
+                        assigned_partner = desc.split(":")[1].strip()
+                        break
+            else:
+                # Events trimmed or not requested: indexed lookup of the latest assignment
+                assigned_partner = self._latest_assignments([s['id']]).get(s['id'])
+                if assigned_partner is None and s.get('events_archive_ref'):
+                    for evt in reversed(event_archive.read_events(s['events_archive_ref'], s['id'])):
+                        desc = evt.get("description", "") or ""
+                        if desc.startswith("ASSIGNED_TO_PARTNER:"):
+                            assigned_partner = desc.split(":")[1].strip()
+                            break
+            s['assigned_partner_id'] = assigned_partner
 
+        return projection.shape(s)
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: admin search latency on a synthetic in-memory index.
+
+Names mix common first names/surnames ("kumar" is in ~10% of rows) with generated
+ones, so the vocabulary and the per-word term lists look like production data.
+Target: every query under 10 ms.
+
+Usage (from backend/): python -m benchmarks.bench_search_index [--shipments 1000000] [--repeat 20]
+"""
+import argparse
+import random
+import time
+import uuid
+
+from app.services.search_index import ShipmentSearchIndex
+
+FIRST = ["ramesh", "suresh", "anita", "sunita", "rahul", "priya", "amit", "neha", "vijay", "kavita",
+         "rajesh", "pooja", "sanjay", "deepa", "arjun", "meena", "ravi", "lakshmi", "mohan", "geeta"]
+LAST = ["kumar", "sharma", "singh", "patel", "reddy", "iyer", "nair", "gupta", "das", "rao"]
+CITIES = ["bengaluru", "mumbai", "new delhi", "chennai", "kolkata", "hyderabad", "pune", "ahmedabad",
+          "jaipur", "lucknow", "kochi", "indore", "bhopal", "nagpur", "surat", "patna"]
+SYLLABLES = ["ra", "vi", "ka", "la", "ma", "ni", "sh", "an", "ta", "pr", "de", "su", "ya", "ha", "ja", "go"]
+
+QUERIES = ["kumar", "anita", "ra", "ramesh kumar", "rmesh kumr", "bengaluru", "DEL-AB", "98765", "zzqx"]
+
+
+def _word(rng: random.Random, common: list) -> str:
+    if rng.random() < 0.5:
+        return rng.choice(common)
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def build_index(n: int, seed: int = 7) -> ShipmentSearchIndex:
+    rng = random.Random(seed)
+    index = ShipmentSearchIndex()
+    for i in range(n):
+        addresses = [
+            {
+                "contact_name": f"{_word(rng, FIRST)} {_word(rng, LAST)}",
+                "contact_phone": f"9{rng.randint(0, 999_999_999):09d}",
+                "city": rng.choice(CITIES),
+            }
+            for _ in range(2)
+        ]
+        index.upsert({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "tracking_id": f"DEL-{uuid.UUID(int=rng.getrandbits(128)).hex[:10].upper()}",
+            "status": "IN_TRANSIT",
+        }, addresses, bulk=True)
+    with index._lock:
+        index._tracking._ensure_sorted()
+        index._phones._ensure_sorted()
+    index.ready = True
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shipments", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = build_index(args.shipments)
+    print(f"Built index over {args.shipments:,} shipments in {time.perf_counter() - started:.1f}s "
+          f"({len(index._names.postings):,} distinct names, {len(index._names.words):,} name words)")
+
+    print(f"{'query':<16}{'hits':>6}{'p50 ms':>9}{'max ms':>9}")
+    for q in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            hits = index.search(q, limit=args.limit)
+            timings.append((time.perf_counter() - t) * 1000)
+        timings.sort()
+        print(f"{q:<16}{len(hits):>6}{timings[len(timings) // 2]:>9.2f}{timings[-1]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmark: current response path vs the FAST_SERIALIZATION path.
+
+current: response_model validation -> model dump (exclude_unset) -> json.dumps (JSONResponse)
+fast:    TrustedSerializer (TypeAdapter over a TypedDict mirror, no validation) -> bytes
+
+Usage (from backend/): python -m benchmarks.bench_serialization [--repeat 5]
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.serialization import FastJSONResponse, TrustedSerializer
+from app.schemas.shipment import ShipmentDetailPartial
+
+
+def make_row(i: int) -> dict:
+    sid = f"00000000-0000-0000-0000-{i:012d}"
+    address = {
+        "contact_name": "Ramesh Kumar", "contact_phone": "9876543210",
+        "address_line_1": "12 MG Road", "address_line_2": None,
+        "city": "Bengaluru", "state": "KA", "pincode": "560001", "country": "India",
+        "id": sid, "shipment_id": sid, "created_at": "2024-02-01T10:00:00+00:00",
+    }
+    return {
+        "id": sid,
+        "tracking_id": f"DEL-{i:010d}",
+        "status": "IN_TRANSIT",
+        "user_id": "11111111-1111-1111-1111-111111111111",
+        "total_weight_kg": 1.5,
+        "created_at": "2024-02-01T10:00:00+00:00",
+        "updated_at": "2024-02-02T10:00:00+00:00",
+        "addresses": [{**address, "type": "PICKUP"}, {**address, "type": "DELIVERY"}],
+        "events": [
+            {"status": s, "description": f"Shipment scanned: {s}", "location": "Bengaluru, KA",
+             "created_at": f"2024-02-0{k + 1}T10:00:00+00:00"}
+            for k, s in enumerate(["PENDING", "PENDING", "PICKED_UP", "IN_TRANSIT"])
+        ],
+        "items": [{"description": "Books", "quantity": 2, "weight_kg": 0.75,
+                   "length_cm": None, "width_cm": None, "height_cm": None}],
+        "assigned_partner_id": "22222222-2222-2222-2222-222222222222",
+    }
+
+
+def current_detail_path(adapter: TypeAdapter, rows: List[dict]) -> bytes:
+    validated = adapter.validate_python(rows)
+    content = adapter.dump_python(validated, mode="json", exclude_unset=True)
+    return JSONResponse(content).body
+
+
+def fast_detail_path(serializer: TrustedSerializer, rows: List[dict]) -> bytes:
+    return serializer.response(rows).body
+
+
+def current_list_path(payload: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fast_list_path(payload: dict) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[ShipmentDetailPartial])
+    serializer = TrustedSerializer(List[ShipmentDetailPartial])
+
+    print(f"{'payload':<22}{'rows':>7}{'current ms':>13}{'fast ms':>10}{'speedup':>9}{'rows/s (fast)':>16}")
+    for n in (1_000, 10_000):
+        rows = [make_row(i) for i in range(n)]
+        list_payload = {"data": rows, "count": n}
+
+        # Same JSON either way (modulo whitespace)
+        assert json.loads(current_detail_path(adapter, rows)) == json.loads(fast_detail_path(serializer, rows))
+
+        cases = [
+            ("detail (validated)", lambda: current_detail_path(adapter, rows), lambda: fast_detail_path(serializer, rows)),
+            ("admin list (dict)", lambda: current_list_path(list_payload), lambda: fast_list_path(list_payload)),
+        ]
+        for name, current, fast in cases:
+            t_current = best_of(current, args.repeat)
+            t_fast = best_of(fast, args.repeat)
+            print(f"{name:<22}{n:>7}{t_current * 1000:>13.1f}{t_fast * 1000:>10.1f}"
+                  f"{t_current / t_fast:>8.1f}x{n / t_fast:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
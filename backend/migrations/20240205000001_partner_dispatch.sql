@@ -0,0 +1,43 @@
+-- Migration: Partner Dispatch
+-- Description: Service areas and daily capacity for delivery partners (used by auto-dispatch).
+
+-- 1. Partner Role
+insert into public.roles (name, description)
+values ('partner', 'Delivery partner')
+on conflict (name) do nothing;
+
+-- 2. Partner Profiles
+create table if not exists public.partner_profiles (
+  id uuid references public.user_profiles(id) on delete cascade primary key,
+
+  -- Pincode prefixes served, e.g. {'5600', '560103'}. Longest matching prefix is the zone.
+  service_pincode_prefixes text[] not null default '{}',
+  -- Max open (not DELIVERED/CANCELLED/RETURNED) shipments at once
+  capacity integer not null default 40 check (capacity >= 0),
+  is_active boolean not null default true,
+
+  created_at timestamptz default now(),
+  updated_at timestamptz default now()
+);
+
+create index idx_partner_profiles_prefixes on public.partner_profiles using gin (service_pincode_prefixes);
+
+-- Assignment lookups filter on the event description
+create index idx_shipment_events_description on public.shipment_events(description text_pattern_ops);
+
+-- 3. RLS
+alter table public.partner_profiles enable row level security;
+
+create policy "Partners can view own profile"
+  on public.partner_profiles for select
+  using ( auth.uid() = id );
+
+create policy "Admins can manage partner profiles"
+  on public.partner_profiles for all
+  using ( public.is_admin() );
+
+drop trigger if exists on_partner_profiles_updated on public.partner_profiles;
+
+create trigger on_partner_profiles_updated
+  before update on public.partner_profiles
+  for each row execute procedure public.handle_updated_at();
@@ -0,0 +1,50 @@
+-- Migration: Event Archive (Hot/Cold Tiering)
+-- Description: Tracks when shipments close and where their archived events live.
+
+-- 1. Columns
+alter table public.shipments add column if not exists closed_at timestamptz;
+-- '<YYYY-MM>/<segment>' of the local archive holding this shipment's events
+alter table public.shipments add column if not exists events_archive_ref text;
+
+-- Archive job scans closed, not-yet-archived shipments by close time
+create index if not exists idx_shipments_archive_candidates
+  on public.shipments(closed_at)
+  where events_archive_ref is null and closed_at is not null;
+
+-- 2. Only block STATUS changes on delivered shipments (archival must update the row)
+create or replace function public.validate_status_transition()
+returns trigger as $$
+begin
+  -- Prevent modifying delivered shipments
+  if old.status = 'DELIVERED' and new.status is distinct from old.status then
+    raise exception 'Delivered shipments cannot change status';
+  end if;
+
+  return new;
+end;
+$$ language plpgsql;
+
+-- 3. Stamp closed_at when a shipment reaches a terminal status
+create or replace function public.set_closed_at()
+returns trigger as $$
+begin
+  if new.status in ('DELIVERED', 'RETURNED') and old.status is distinct from new.status then
+    new.closed_at := now();
+  end if;
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists set_shipment_closed_at on public.shipments;
+
+create trigger set_shipment_closed_at
+  before update on public.shipments
+  for each row execute procedure public.set_closed_at();
+
+-- 4. Backfill from the event log
+update public.shipments s
+set closed_at = (
+  select max(e.created_at) from public.shipment_events e
+  where e.shipment_id = s.id and e.status = s.status
+)
+where s.status in ('DELIVERED', 'RETURNED') and s.closed_at is null;
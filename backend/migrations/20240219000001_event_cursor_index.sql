@@ -0,0 +1,6 @@
+-- Migration: Incremental Event Timeline
+-- Description: Lets `GET /shipments/{id}/events?since=<cursor>` read only events newer than
+-- the client's last (created_at, id) with one index range scan.
+
+create index if not exists idx_shipment_events_shipment_created
+  on public.shipment_events(shipment_id, created_at, id);
@@ -0,0 +1,18 @@
+-- Migration: Customer Shipment Listing
+-- Description: Keyset-paginated "my shipments" (GET /shipments) and per-status counts.
+
+-- Newest first per owner; (created_at, id) is the page cursor
+create index if not exists idx_shipments_user_created
+  on public.shipments(user_id, created_at desc, id desc);
+
+-- Counts come from an index-only scan instead of shipping every row to the API
+create index if not exists idx_shipments_user_status
+  on public.shipments(user_id, status);
+
+create or replace function public.shipment_status_counts(p_user_id uuid)
+returns table (status public.shipment_status, count bigint) as $$
+  select s.status, count(*)
+  from public.shipments s
+  where s.user_id = p_user_id
+  group by s.status;
+$$ language sql stable;
@@ -0,0 +1,32 @@
+-- Migration: Partner Open Loads
+-- Description: Per-partner count of open shipments for auto-dispatch, computed in the
+-- database instead of reading every assignment event a partner ever had.
+
+-- Open shipments are a small, hot slice of the table
+create index if not exists idx_shipments_open
+  on public.shipments(id)
+  where status not in ('DELIVERED', 'CANCELLED', 'RETURNED');
+
+-- Latest assignment per shipment
+create index if not exists idx_shipment_events_assignment
+  on public.shipment_events(shipment_id, created_at desc)
+  where description like 'ASSIGNED_TO_PARTNER:%';
+
+-- Open shipments whose LATEST assignment is each partner (a re-assigned shipment
+-- counts for its current partner only). Closed shipments never count, so archived
+-- events are irrelevant here.
+create or replace function public.partner_open_loads(p_partner_ids text[])
+returns table (partner_id text, open_count bigint) as $$
+  select latest.partner_id, count(*)
+  from (
+    select distinct on (e.shipment_id)
+      trim(split_part(e.description, ':', 2)) as partner_id
+    from public.shipment_events e
+    join public.shipments s on s.id = e.shipment_id
+    where e.description like 'ASSIGNED_TO_PARTNER:%'
+      and s.status not in ('DELIVERED', 'CANCELLED', 'RETURNED')
+    order by e.shipment_id, e.created_at desc
+  ) latest
+  where latest.partner_id = any(p_partner_ids)
+  group by latest.partner_id;
+$$ language sql stable;
@@ -0,0 +1,13 @@
+-- Migration: Shipment updated_at
+-- Description: Keeps shipments.updated_at current on every update so the admin search
+-- index can catch up incrementally (rows changed since its snapshot) instead of
+-- re-reading the whole table in every worker.
+
+drop trigger if exists on_shipments_updated on public.shipments;
+
+create trigger on_shipments_updated
+  before update on public.shipments
+  for each row execute procedure public.handle_updated_at();
+
+create index if not exists idx_shipments_updated_at
+  on public.shipments(updated_at);
@@ -0,0 +1,76 @@
+"""
+Two-process checks for the unix-socket invalidation transport: a publisher in this
+process, a subscribing worker in a forked child.
+"""
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from app.core.invalidation import InvalidationBus, UnixSocketTransport
+
+KEYS = 200
+
+
+def _subscriber(directory: str, results, slow_first: bool):
+    bus = InvalidationBus(UnixSocketTransport(directory))
+    received = []
+    done = multiprocessing.Event()
+
+    def on_key(key, data, change):
+        if slow_first and not received:
+            time.sleep(0.5)  # let the publisher overrun our receive queue
+        received.append(key)
+
+    bus.subscribe("k:", on_key)
+    bus.subscribe("done", lambda key, data, change: done.set())
+    bus.start()
+    done.wait(10)
+    bus.stop()
+    results.put({
+        "received": len(received),
+        "done": done.is_set(),
+        # A gap resets every key, so even never-published keys read as changed
+        "reset": bus.version("never-published") > 0,
+        "unchanged": [f"k:{i}" for i in range(KEYS) if bus.version(f"k:{i}") == 0],
+    })
+
+
+def _run(tmp_path, send_timeout: float, slow_first: bool):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    child = ctx.Process(target=_subscriber, args=(str(tmp_path), results, slow_first))
+    child.start()
+    deadline = time.monotonic() + 5
+    while not any(f.endswith(".sock") for f in os.listdir(tmp_path)):
+        assert time.monotonic() < deadline, "subscriber never bound its socket"
+        time.sleep(0.01)
+
+    publisher = InvalidationBus(UnixSocketTransport(str(tmp_path), send_timeout=send_timeout))
+    for i in range(KEYS):
+        publisher.publish(f"k:{i}")
+    time.sleep(1)
+    publisher.publish("done")
+
+    outcome = results.get(timeout=10)
+    child.join(5)
+    return outcome
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork and unix sockets")
+def test_burst_is_delivered(tmp_path):
+    outcome = _run(tmp_path, send_timeout=0.05, slow_first=False)
+    assert outcome["done"]
+    assert outcome["received"] == KEYS
+    assert not outcome["reset"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork and unix sockets")
+def test_dropped_messages_reset_the_peer(tmp_path):
+    outcome = _run(tmp_path, send_timeout=0.001, slow_first=True)
+    assert outcome["done"]
+    assert outcome["received"] < KEYS
+    assert outcome["reset"]
+    # Every key was either delivered or covered by the reset
+    assert outcome["unchanged"] == []
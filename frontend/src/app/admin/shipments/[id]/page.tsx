@@ -154,10 +154,10 @@ export default function AdminShipmentDetailPage() {
                         {/* Timeline Reuse (Simplified) */}
                         <div className="flow-root">
                             <ul role="list" className="-mb-8">
-                                {shipment.shipment_events.map((event: any, idx: number) => (
+                                {(shipment.events ?? []).map((event: any, idx: number) => (
                                     <li key={idx}>
                                         <div className="relative pb-8">
-                                            {idx !== shipment.shipment_events.length - 1 ? (
+                                            {idx !== shipment.events.length - 1 ? (
                                                 <span className="absolute top-4 left-4 -ml-px h-full w-0.5 bg-gray-200" aria-hidden="true"></span>
                                             ) : null}
                                             <div className="relative flex space-x-3">
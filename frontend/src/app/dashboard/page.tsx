@@ -16,22 +16,44 @@ import {
 
 export default function DashboardPage() {
     const [shipments, setShipments] = useState<any[]>([]);
+    const [statusCounts, setStatusCounts] = useState<Record<string, number>>({});
+    const [total, setTotal] = useState(0);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [searchTerm, setSearchTerm] = useState('');
 
+    // One page at a time from the backend; counts cover all shipments
+    const fetchPage = async (cursor: string | null) => {
+        const { data: session } = await supabase.auth.getSession();
+        if (!session?.session) return;
+
+        const query = new URLSearchParams({ limit: '24' });
+        if (cursor) query.set('cursor', cursor);
+        const res = await fetch(`/api/v1/shipments?${query}`, {
+            headers: { 'Authorization': `Bearer ${session.session.access_token}` }
+        });
+        if (!res.ok) {
+            console.error("Error fetching shipments", res.status);
+            return;
+        }
+        const page = await res.json();
+        setShipments(prev => cursor ? [...prev, ...page.data] : page.data);
+        setStatusCounts(page.status_counts);
+        setTotal(page.total);
+        setNextCursor(page.next_cursor);
+    };
+
     useEffect(() => {
-        const fetchShipments = async () => {
-            const { data, error } = await supabase
-                .from('shipments')
-                .select('*')
-                .order('created_at', { ascending: false });
-
-            if (data) setShipments(data);
-            setLoading(false);
-        };
-        fetchShipments();
+        fetchPage(null).finally(() => setLoading(false));
     }, []);
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        await fetchPage(nextCursor);
+        setLoadingMore(false);
+    };
+
     const filteredShipments = shipments.filter(s =>
         s.tracking_id?.toLowerCase().includes(searchTerm.toLowerCase()) ||
         s.status?.toLowerCase().includes(searchTerm.toLowerCase())
@@ -129,25 +151,26 @@ export default function DashboardPage() {
                             </div>
 
                             <div className="space-y-3">
-                                {shipment.pickup_address && (
+                                {shipment.latest_event && (
                                     <div className="flex items-start gap-2">
-                                        <MapPin className="w-4 h-4 text-slate-400 mt-0.5 flex-shrink-0" />
+                                        <Package className="w-4 h-4 text-slate-400 mt-0.5 flex-shrink-0" />
                                         <div>
-                                            <p className="text-xs text-slate-500 uppercase tracking-wide">From</p>
+                                            <p className="text-xs text-slate-500 uppercase tracking-wide">Latest</p>
                                             <p className="text-sm text-slate-700 dark:text-slate-300 line-clamp-1">
-                                                {shipment.pickup_address}
+                                                {shipment.latest_event.description || shipment.latest_event.status}
+                                                {shipment.latest_event.location && ` · ${shipment.latest_event.location}`}
                                             </p>
                                         </div>
                                     </div>
                                 )}
 
-                                {shipment.delivery_address && (
+                                {shipment.destination_city && (
                                     <div className="flex items-start gap-2">
                                         <MapPin className="w-4 h-4 text-emerald-500 mt-0.5 flex-shrink-0" />
                                         <div>
                                             <p className="text-xs text-slate-500 uppercase tracking-wide">To</p>
                                             <p className="text-sm text-slate-700 dark:text-slate-300 line-clamp-1">
-                                                {shipment.delivery_address}
+                                                {shipment.destination_city}
                                             </p>
                                         </div>
                                     </div>
@@ -169,31 +192,40 @@ export default function DashboardPage() {
                 </div>
             )}
 
+            {/* Next Page */}
+            {!loading && nextCursor && (
+                <div className="mt-6 text-center">
+                    <button onClick={loadMore} disabled={loadingMore} className="btn-primary disabled:opacity-50">
+                        {loadingMore ? 'Loading...' : 'Load More'}
+                    </button>
+                </div>
+            )}
+
             {/* Stats Summary */}
             {!loading && shipments.length > 0 && (
                 <div className="mt-8 p-4 bg-slate-100 dark:bg-slate-800 rounded-xl">
                     <div className="grid grid-cols-2 sm:grid-cols-4 gap-4 text-center">
                         <div>
                             <p className="text-2xl font-bold text-slate-900 dark:text-white">
-                                {shipments.length}
+                                {total}
                             </p>
                             <p className="text-caption">Total</p>
                         </div>
                         <div>
                             <p className="text-2xl font-bold text-amber-600">
-                                {shipments.filter(s => s.status === 'PENDING').length}
+                                {statusCounts.PENDING || 0}
                             </p>
                             <p className="text-caption">Pending</p>
                         </div>
                         <div>
                             <p className="text-2xl font-bold text-blue-600">
-                                {shipments.filter(s => ['IN_TRANSIT', 'OUT_FOR_DELIVERY', 'PICKED_UP'].includes(s.status)).length}
+                                {['IN_TRANSIT', 'OUT_FOR_DELIVERY', 'PICKED_UP'].reduce((n, s) => n + (statusCounts[s] || 0), 0)}
                             </p>
                             <p className="text-caption">In Transit</p>
                         </div>
                         <div>
                             <p className="text-2xl font-bold text-emerald-600">
-                                {shipments.filter(s => s.status === 'DELIVERED').length}
+                                {statusCounts.DELIVERED || 0}
                             </p>
                             <p className="text-caption">Delivered</p>
                         </div>
@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { supabase } from '@/lib/supabase';
 import { useRouter, useParams } from 'next/navigation';
 
@@ -11,26 +11,55 @@ export default function ShipmentDetailPage() {
     const [loading, setLoading] = useState(true);
     const [pickupLoading, setPickupLoading] = useState(false);
     const router = useRouter();
+    // Cursor of the newest event we have; refreshes only ask for events after it
+    const eventsCursor = useRef<string | null>(null);
+
+    const fetchEvents = async (accessToken: string): Promise<any[] | null> => {
+        const query = eventsCursor.current ? `?since=${encodeURIComponent(eventsCursor.current)}` : '';
+        const res = await fetch(`/api/v1/shipments/${id}/events${query}`, {
+            headers: { 'Authorization': `Bearer ${accessToken}` }
+        });
+        if (!res.ok) {
+            console.error("Error fetching events", res.status);
+            return null;
+        }
+        eventsCursor.current = res.headers.get('X-Next-Cursor') || eventsCursor.current;
+        // Oldest first from the API; shown newest first
+        return (await res.json()).reverse();
+    };
 
     const fetchDetail = async () => {
-        // Fetch deep details: Events, Addresses
+        // Shipment + addresses once; the timeline comes from the events endpoint
         const { data, error } = await supabase
             .from('shipments')
-            .select('*, shipment_events(*), shipment_addresses(*)')
+            .select('*, shipment_addresses(*)')
             .eq('id', id)
             .single();
 
-        if (error || !data) {
+        const { data: session } = await supabase.auth.getSession();
+
+        if (error || !data || !session?.session) {
             // Handle error (redirect or show msg)
             console.error("Error fetching", error);
         } else {
-            // Sort events DESC
-            data.shipment_events.sort((a: any, b: any) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime());
+            eventsCursor.current = null;
+            data.shipment_events = (await fetchEvents(session.session.access_token)) || [];
             setShipment(data);
         }
         setLoading(false);
     };
 
+    const refreshEvents = async (accessToken: string) => {
+        const newer = await fetchEvents(accessToken);
+        if (newer && newer.length) {
+            setShipment((prev: any) => prev && ({
+                ...prev,
+                status: newer[0].status,
+                shipment_events: [...newer, ...prev.shipment_events]
+            }));
+        }
+    };
+
     useEffect(() => {
         fetchDetail();
     }, [id]);
@@ -81,7 +110,7 @@ export default function ShipmentDetailPage() {
             }
 
             alert("Pickup Scheduled!");
-            fetchDetail(); // Refresh to see event
+            refreshEvents(accessToken); // Only the new event
         } catch (e: any) {
             alert("Error: " + e.message);
         } finally {